@@ -1,6 +1,7 @@
-from fastapi import HTTPException, Security
+from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from config import config
+from profiling import timed
 
 security = HTTPBasic()
 
@@ -17,8 +18,9 @@ def verify_auth(credentials: HTTPBasicCredentials = Security(security)) -> str:
     Raises:
         HTTPException: 401 if credentials are invalid
     """
-    correct_username = credentials.username == config.AUTH_USERNAME
-    correct_password = credentials.password == config.AUTH_PASSWORD
+    with timed("auth"):
+        correct_username = credentials.username == config.AUTH_USERNAME
+        correct_password = credentials.password == config.AUTH_PASSWORD
 
     if not (correct_username and correct_password):
         raise HTTPException(
@@ -28,3 +30,21 @@ def verify_auth(credentials: HTTPBasicCredentials = Security(security)) -> str:
         )
 
     return credentials.username
+
+def verify_admin(username: str = Depends(verify_auth)) -> str:
+    """
+    Verify that the authenticated user is an administrator
+
+    Args:
+        username: Authenticated username (injected by verify_auth)
+
+    Returns:
+        Username if the user is listed in ADMIN_USERNAMES
+
+    Raises:
+        HTTPException: 403 if the user is not an administrator
+    """
+    if username not in config.ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return username
@@ -0,0 +1,316 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import List, Optional
+
+class AgentBackend(ABC):
+    """
+    Adapter between agent-api and one agent CLI
+
+    Subclasses describe how to invoke the CLI and how to turn its output into
+    the canonical result dict used throughout agent-api and the portal:
+    {"type": "result", "result", "session_id", "total_cost_usd", "num_turns", "is_error"}
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, command: str):
+        """
+        Initialize backend
+
+        Args:
+            name: Unique backend name used in routing rules
+            command: CLI executable
+        """
+        self.name = name
+        self.command = command
+
+    @abstractmethod
+    def build_args(self, message: str, session_id: Optional[str] = None, stream: bool = False) -> list:
+        """Build the command line for one task"""
+
+    @abstractmethod
+    def parse_output(self, stdout: str) -> dict:
+        """
+        Parse the complete (non-streaming) output of a task
+
+        Raises:
+            ValueError: If the output cannot be parsed
+        """
+
+    @abstractmethod
+    def parse_stream_result(self, line: bytes) -> Optional[dict]:
+        """Return the canonical result if a streamed line is the final event, else None"""
+
+    @abstractmethod
+    def is_progress_event(self, line: bytes) -> bool:
+        """Whether a streamed line shows the agent acted (answered, edited files, advanced the session)"""
+
+class ClaudeCliBackend(AgentBackend):
+    """Claude Code CLI in headless mode (claude -p)"""
+
+    type_name = "claude-cli"
+
+    # Canonical result fields and the CLI fields they are read from by default
+    CANONICAL_FIELDS = ("result", "session_id", "total_cost_usd", "num_turns", "is_error")
+
+    def __init__(self, name: str = "claude", command: str = "claude", max_turns: int = 0,
+                 field_map: Optional[dict] = None):
+        """
+        Initialize Claude CLI backend
+
+        Args:
+            name: Unique backend name used in routing rules
+            command: Claude CLI executable
+            max_turns: Cap on agent turns per task (0 = no cap)
+            field_map: Canonical field -> output field, for compatible CLIs that
+                name result fields differently (e.g. {"total_cost_usd": "cost_usd"})
+
+        Raises:
+            ValueError: If field_map names an unknown canonical field
+        """
+        super().__init__(name, command)
+        self.max_turns = max_turns
+        unknown = set(field_map or {}) - set(self.CANONICAL_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown result fields in field_map: {', '.join(sorted(unknown))}")
+        self.field_map = {field: field for field in self.CANONICAL_FIELDS}
+        self.field_map.update(field_map or {})
+
+    def build_args(self, message: str, session_id: Optional[str] = None, stream: bool = False) -> list:
+        if stream:
+            # stream-json requires --verbose in headless mode
+            args = [self.command, "-p", message, "--output-format", "stream-json", "--verbose"]
+        else:
+            args = [self.command, "-p", message, "--output-format", "json"]
+
+        if session_id:
+            args.extend(["--resume", session_id])
+
+        if self.max_turns:
+            args.extend(["--max-turns", str(self.max_turns)])
+
+        return args
+
+    def _canonical(self, output: dict) -> dict:
+        """Map a CLI result object onto the canonical result fields"""
+        result = {"type": "result"}
+        result.update({canonical: output.get(field) for canonical, field in self.field_map.items()})
+        result["result"] = result["result"] or ""
+        result["session_id"] = result["session_id"] or ""
+        result["total_cost_usd"] = result["total_cost_usd"] or 0.0
+        result["num_turns"] = result["num_turns"] or 0
+        result["is_error"] = bool(result["is_error"])
+        return result
+
+    def parse_output(self, stdout: str) -> dict:
+        output = json.loads(stdout)
+        if not isinstance(output, dict):
+            raise ValueError("Expected a JSON object")
+        return self._canonical(output)
+
+    def parse_stream_result(self, line: bytes) -> Optional[dict]:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return None
+        if isinstance(event, dict) and event.get("type") == "result":
+            return self._canonical(event)
+        return None
+
+    def is_progress_event(self, line: bytes) -> bool:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return False
+        return isinstance(event, dict) and event.get("type") == "assistant"
+
+# Backend types that can be configured via AGENT_BACKENDS
+BACKEND_TYPES = {
+    ClaudeCliBackend.type_name: ClaudeCliBackend,
+}
+
+def load_backends(specs: list, default_command: str = "claude", max_turns: int = 0) -> List[AgentBackend]:
+    """
+    Build backends from configuration
+
+    Args:
+        specs: List of {"name", "type", "command", ...} dicts (empty = single default backend)
+        default_command: Command for the default backend (AGENT_CLI_COMMAND)
+        max_turns: Turn cap applied to Claude CLI backends
+
+    Returns:
+        List of backends in configured order
+
+    Raises:
+        ValueError: On unknown types or duplicate names
+    """
+    if not specs:
+        return [ClaudeCliBackend(name="default", command=default_command, max_turns=max_turns)]
+
+    backends = []
+    for spec in specs:
+        backend_type = spec.get("type", ClaudeCliBackend.type_name)
+        if backend_type not in BACKEND_TYPES:
+            raise ValueError(f"Unknown agent backend type: {backend_type}")
+        options = {k: v for k, v in spec.items() if k != "type"}
+        options.setdefault("command", default_command)
+        if backend_type == ClaudeCliBackend.type_name:
+            options.setdefault("max_turns", max_turns)
+        backends.append(BACKEND_TYPES[backend_type](**options))
+
+    names = [b.name for b in backends]
+    if len(set(names)) != len(names):
+        raise ValueError("Agent backend names must be unique")
+    return backends
+
+class BackendRouter:
+    """
+    Chooses which backend runs a task and in which order to fall back
+
+    Tracks in-flight tasks and a moving average of successful run time per
+    backend. Routing rules pick the allowed backends and strategy per project
+    ("least_loaded" or "fastest"); backends that failed recently are tried last.
+    """
+
+    STRATEGIES = ("least_loaded", "fastest")
+
+    # Weight of the newest sample in the latency moving average
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, backends: List[AgentBackend], routes: Optional[dict] = None,
+                 strategy: str = "least_loaded", cooldown: float = 60.0):
+        """
+        Initialize router
+
+        Args:
+            backends: Configured backends
+            routes: Project path (or "default") -> {"backends": [names], "strategy": name}
+            strategy: Default strategy when a route does not set one
+            cooldown: Seconds a failed backend is deprioritized
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown routing strategy: {strategy}")
+        self.backends = {b.name: b for b in backends}
+        self.order = [b.name for b in backends]
+        self.routes = routes or {}
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._in_flight = {name: 0 for name in self.order}
+        self._latency = {name: None for name in self.order}
+        self._failed_at = {name: None for name in self.order}
+
+    def get(self, name: str) -> AgentBackend:
+        """
+        Look up a backend by name
+
+        Raises:
+            KeyError: If no backend has that name
+        """
+        return self.backends[name]
+
+    def candidates(self, project: str, preferred: Optional[str] = None) -> List[AgentBackend]:
+        """
+        Order backends for a task, best first
+
+        Args:
+            project: Project path the task runs in (selects the routing rule)
+            preferred: Backend requested explicitly, tried first
+
+        Returns:
+            Backends to try in order - the rest are fallbacks
+
+        Raises:
+            KeyError: If the preferred backend does not exist
+        """
+        route = self.routes.get(project) or self.routes.get("default") or {}
+        names = [n for n in route.get("backends", self.order) if n in self.backends] or list(self.order)
+        strategy = route.get("strategy", self.strategy)
+
+        with self._lock:
+            def rank(name):
+                cooling = self._cooling_down(name)
+                load = self._in_flight[name]
+                latency = self._latency[name] or 0.0  # Untried backends get a chance
+                if strategy == "fastest":
+                    return (cooling, latency, load)
+                return (cooling, load, latency)
+
+            ordered = sorted(names, key=lambda n: (rank(n), names.index(n)))
+
+        if preferred:
+            self.get(preferred)
+            ordered = [preferred] + [n for n in ordered if n != preferred]
+
+        return [self.backends[n] for n in ordered]
+
+    def _cooling_down(self, name: str) -> bool:
+        """Whether a backend failed within the cooldown window (caller holds the lock)"""
+        failed_at = self._failed_at[name]
+        return failed_at is not None and time.monotonic() - failed_at < self.cooldown
+
+    def begin(self, backend: AgentBackend):
+        """Mark a task as started on a backend"""
+        with self._lock:
+            self._in_flight[backend.name] += 1
+
+    def end(self, backend: AgentBackend, success: Optional[bool], elapsed: float):
+        """
+        Mark a task as finished on a backend
+
+        Args:
+            backend: Backend that ran the task
+            success: Whether the backend produced a result (None = outcome unknown)
+            elapsed: Run time in seconds
+        """
+        with self._lock:
+            self._in_flight[backend.name] = max(self._in_flight[backend.name] - 1, 0)
+            if success is None:
+                return
+            if success:
+                previous = self._latency[backend.name]
+                self._latency[backend.name] = elapsed if previous is None else (
+                    self.LATENCY_ALPHA * elapsed + (1 - self.LATENCY_ALPHA) * previous
+                )
+                self._failed_at[backend.name] = None
+            else:
+                self._failed_at[backend.name] = time.monotonic()
+
+    def mark_failed(self, backend: AgentBackend):
+        """Deprioritize a backend that could not even be started"""
+        with self._lock:
+            self._failed_at[backend.name] = time.monotonic()
+
+    @contextmanager
+    def track(self, backend: AgentBackend):
+        """
+        Track one synchronous run; set the yielded dict's "success" key to report the outcome
+
+        Example:
+            with router.track(backend) as run:
+                run["success"] = execute(...).success
+        """
+        run = {"success": False}
+        self.begin(backend)
+        start = time.monotonic()
+        try:
+            yield run
+        finally:
+            self.end(backend, run["success"], time.monotonic() - start)
+
+    def stats(self) -> list:
+        """Current load and latency per backend"""
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "type": self.backends[name].type_name,
+                    "in_flight": self._in_flight[name],
+                    "avg_seconds": round(self._latency[name], 3) if self._latency[name] is not None else None,
+                    "cooling_down": self._cooling_down(name),
+                }
+                for name in self.order
+            ]
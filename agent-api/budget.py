@@ -0,0 +1,193 @@
+import json
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+from profiling import timed
+
+class BudgetExceededError(Exception):
+    """Raised when a submission would exceed a configured spending limit"""
+
+class UsageStore:
+    """
+    Rolling store of pre-aggregated usage counters
+
+    Counters are kept per day for three scopes - global, per user and per
+    session - as compact [cost, turns, tasks] triples. Days older than the
+    retention window are dropped on every write, so the file stays small and
+    usage queries never need to rescan task results.
+    """
+
+    SCOPES = ("global", "user", "session")
+
+    def __init__(self, path: str, retention_days: int = 30,
+                 daily_limit: float = 0.0, user_daily_limit: float = 0.0,
+                 session_limit: float = 0.0):
+        """
+        Initialize usage store
+
+        Args:
+            path: JSON file used to persist counters
+            retention_days: Number of days of counters to keep
+            daily_limit: Max USD per day across all users (0 = unlimited)
+            user_daily_limit: Max USD per user per day (0 = unlimited)
+            session_limit: Max USD per session over the retention window (0 = unlimited)
+        """
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.daily_limit = daily_limit
+        self.user_daily_limit = user_daily_limit
+        self.session_limit = session_limit
+        self._lock = threading.Lock()
+        self._counters = self._load()
+
+    def _load(self) -> dict:
+        """Load counters from disk, starting empty if the file is missing or corrupt"""
+        counters = {"global": {}, "user": {}, "session": {}}
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            for scope in self.SCOPES:
+                counters[scope] = stored.get(scope, {})
+        except (OSError, json.JSONDecodeError):
+            pass
+        return counters
+
+    def _save(self):
+        """Persist counters atomically (caller holds the lock)"""
+        with timed("store"):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(self._counters, f, separators=(",", ":"))
+            tmp_path.replace(self.path)
+
+    def _prune(self, today: date):
+        """Drop day buckets outside the retention window (caller holds the lock)"""
+        cutoff = (today - timedelta(days=self.retention_days - 1)).isoformat()
+        for scope in self.SCOPES:
+            for key in list(self._counters[scope]):
+                days = self._counters[scope][key]
+                for day in [d for d in days if d < cutoff]:
+                    del days[day]
+                if not days:
+                    del self._counters[scope][key]
+
+    def _bump(self, scope: str, key: str, day: str, cost: float, turns: int):
+        """Add one task's usage to a counter (caller holds the lock)"""
+        days = self._counters[scope].setdefault(key, {})
+        bucket = days.setdefault(day, [0.0, 0, 0])
+        bucket[0] = round(bucket[0] + cost, 6)
+        bucket[1] += turns
+        bucket[2] += 1
+
+    def record(self, username: str, session_id: Optional[str], cost: float,
+               turns: int, today: Optional[date] = None):
+        """
+        Record usage of a finished task
+
+        Args:
+            username: Authenticated user who submitted the task
+            session_id: Session the task ran in (skipped if empty)
+            cost: Cost in USD reported by the CLI
+            turns: Number of turns reported by the CLI
+            today: Day to book usage against (defaults to today)
+        """
+        today = today or date.today()
+        day = today.isoformat()
+        with self._lock:
+            self._bump("global", "all", day, cost, turns)
+            self._bump("user", username, day, cost, turns)
+            if session_id:
+                self._bump("session", session_id, day, cost, turns)
+            self._prune(today)
+            self._save()
+
+    def totals(self, scope: str, key: str, days: int = 1,
+               today: Optional[date] = None) -> dict:
+        """
+        Sum counters for one scope/key over the last N days
+
+        Args:
+            scope: "global", "user" or "session"
+            key: Username or session ID ("all" for global)
+            days: Number of days to include, ending today
+            today: Last day to include (defaults to today)
+
+        Returns:
+            Dict with cost, turns and tasks
+        """
+        today = today or date.today()
+        cutoff = (today - timedelta(days=days - 1)).isoformat()
+        cost, turns, tasks = 0.0, 0, 0
+        with self._lock:
+            for day, bucket in self._counters[scope].get(key, {}).items():
+                if day >= cutoff:
+                    cost += bucket[0]
+                    turns += bucket[1]
+                    tasks += bucket[2]
+        return {"cost": round(cost, 6), "turns": turns, "tasks": tasks}
+
+    def check(self, username: str, session_id: Optional[str] = None,
+              today: Optional[date] = None):
+        """
+        Enforce spending limits before a task is submitted
+
+        Args:
+            username: Authenticated user submitting the task
+            session_id: Session being resumed (None for a new session)
+            today: Day to check against (defaults to today)
+
+        Raises:
+            BudgetExceededError: If any configured limit is already reached
+        """
+        if self.daily_limit:
+            spent = self.totals("global", "all", today=today)["cost"]
+            if spent >= self.daily_limit:
+                raise BudgetExceededError(
+                    f"Daily budget of ${self.daily_limit:.2f} reached (spent ${spent:.2f})"
+                )
+
+        if self.user_daily_limit:
+            spent = self.totals("user", username, today=today)["cost"]
+            if spent >= self.user_daily_limit:
+                raise BudgetExceededError(
+                    f"Daily budget of ${self.user_daily_limit:.2f} for user {username} reached (spent ${spent:.2f})"
+                )
+
+        if self.session_limit and session_id:
+            spent = self.totals("session", session_id, days=self.retention_days, today=today)["cost"]
+            if spent >= self.session_limit:
+                raise BudgetExceededError(
+                    f"Session budget of ${self.session_limit:.2f} reached (spent ${spent:.2f})"
+                )
+
+    def summary(self, username: str, session_id: Optional[str] = None,
+                days: int = 1, today: Optional[date] = None) -> dict:
+        """
+        Build the usage report returned by the API
+
+        Args:
+            username: User to report on
+            session_id: Optional session to include
+            days: Number of days to include, ending today
+            today: Last day to include (defaults to today)
+
+        Returns:
+            Dict with global, user and optional session totals plus limits
+        """
+        days = max(1, min(days, self.retention_days))
+        result = {
+            "days": days,
+            "global": self.totals("global", "all", days, today),
+            "user": self.totals("user", username, days, today),
+            "limits": {
+                "daily_usd": self.daily_limit,
+                "user_daily_usd": self.user_daily_limit,
+                "session_usd": self.session_limit,
+            },
+        }
+        if session_id:
+            result["session"] = self.totals("session", session_id, self.retention_days, today)
+        return result
@@ -1,9 +1,13 @@
 import json
 import subprocess
+import time
 from typing import Optional
 from pydantic import BaseModel
 from pathlib import Path
 
+from profiling import add_timing
+from backends import AgentBackend, ClaudeCliBackend
+
 class ClaudeResponse(BaseModel):
     """Response from Claude Code CLI"""
     response: str
@@ -12,6 +16,7 @@ class ClaudeResponse(BaseModel):
     turns: int
     success: bool = True
     error: Optional[str] = None
+    retryable: bool = False  # Failed before the agent did anything - safe to re-run elsewhere
 
 class ClaudeWrapper:
     """
@@ -19,19 +24,26 @@ class ClaudeWrapper:
     Uses headless mode (claude -p) with JSON output
     """
 
-    def __init__(self, project_path: str = None, timeout: int = 600):
+    def __init__(self, project_path: str = None, timeout: int = 600,
+                 backend: Optional[AgentBackend] = None):
         """
         Initialize Claude wrapper
 
         Args:
             project_path: Working directory for Claude context
             timeout: Maximum execution time in seconds (default: 10 minutes)
+            backend: Default backend adapter (defaults to the Claude CLI); carries the turn cap
         """
         self.project_path = project_path or str(Path.cwd())
         self.timeout = timeout
-        self.cli_command = "claude"  # Can be configured via env var
+        self.backend = backend or ClaudeCliBackend()
         self._check_authentication()
 
+    @property
+    def cli_command(self) -> str:
+        """Command of the default backend"""
+        return self.backend.command
+
     def _check_authentication(self):
         """
         Check if Claude CLI is properly authenticated
@@ -51,22 +63,35 @@ class ClaudeWrapper:
         if os.getenv('ANTHROPIC_API_KEY'):
             print("Warning: ANTHROPIC_API_KEY is set in environment but will be ignored. Using 'claude login' authentication instead.")
 
-    def execute(self, message: str, session_id: Optional[str] = None) -> ClaudeResponse:
+    def build_args(self, message: str, session_id: Optional[str] = None, stream: bool = False) -> list:
+        """
+        Build command arguments for the default backend
+
+        Args:
+            message: User's message/prompt
+            session_id: Existing session UUID (None for new session)
+            stream: Emit newline-delimited JSON events instead of a single JSON result
+
+        Returns:
+            Argument list for subprocess
+        """
+        return self.backend.build_args(message, session_id, stream)
+
+    def execute(self, message: str, session_id: Optional[str] = None,
+                backend: Optional[AgentBackend] = None) -> ClaudeResponse:
         """
         Execute Claude Code command directly
 
         Args:
             message: User's message/prompt
             session_id: Existing session UUID (None for new session)
+            backend: Backend to run on (defaults to the wrapper's backend)
 
         Returns:
             ClaudeResponse with parsed output
         """
-        # Build command arguments
-        args = [self.cli_command, "-p", message, "--output-format", "json"]
-
-        if session_id:
-            args.extend(["--resume", session_id])
+        backend = backend or self.backend
+        args = backend.build_args(message, session_id)
 
         try:
             # Prepare clean environment - remove ANTHROPIC_API_KEY to ensure we use claude login
@@ -86,23 +111,26 @@ class ClaudeWrapper:
 
             # Parse JSON output
             if result.returncode == 0:
-                output = json.loads(result.stdout)
+                output = backend.parse_output(result.stdout)
 
-                # Extract fields from Claude's JSON response
+                # Extract fields from the backend's canonical result
                 return ClaudeResponse(
-                    response=output.get("result", ""),
-                    session_id=output.get("session_id", ""),
-                    cost=output.get("total_cost_usd", 0.0),
-                    turns=output.get("num_turns", 0),
+                    response=output["result"],
+                    session_id=output["session_id"],
+                    cost=output["total_cost_usd"],
+                    turns=output["num_turns"],
                     success=True
                 )
             else:
                 # Command failed - try to parse error from stdout JSON
                 error_msg = result.stderr
+                progressed = False
                 try:
-                    error_output = json.loads(result.stdout)
-                    if error_output.get('is_error'):
-                        error_msg = error_output.get('result', error_msg)
+                    error_output = backend.parse_output(result.stdout)
+                    if error_output['is_error']:
+                        error_msg = error_output['result'] or error_msg
+                    # Turns taken or cost incurred mean the agent already acted
+                    progressed = error_output['num_turns'] > 0 or error_output['total_cost_usd'] > 0
                 except:
                     pass
 
@@ -120,7 +148,8 @@ class ClaudeWrapper:
                     cost=0.0,
                     turns=0,
                     success=False,
-                    error=f"Agent CLI error: {error_msg}"
+                    error=f"Agent CLI error: {error_msg}",
+                    retryable=not progressed
                 )
 
         except subprocess.TimeoutExpired:
@@ -133,7 +162,19 @@ class ClaudeWrapper:
                 error=f"Request timed out after {self.timeout} seconds"
             )
 
-        except json.JSONDecodeError as e:
+        except OSError as e:
+            # CLI could not be started (not installed, not executable)
+            return ClaudeResponse(
+                response="",
+                session_id=session_id or "",
+                cost=0.0,
+                turns=0,
+                success=False,
+                error=f"Failed to start agent CLI: {str(e)}",
+                retryable=True
+            )
+
+        except ValueError as e:
             return ClaudeResponse(
                 response="",
                 session_id=session_id or "",
@@ -165,24 +206,33 @@ class ClaudeWrapper:
 
         sessions = {}
         try:
+            # Stream the history file; only json.loads counts as "parse", the rest as "store"
+            started = time.perf_counter()
+            parse_seconds = 0.0
             with open(history_file, 'r') as f:
                 for line in f:
+                    parse_started = time.perf_counter()
                     try:
                         entry = json.loads(line)
-                        session_id = entry.get('sessionId')
-                        project = entry.get('project', '')
-
-                        # ONLY include sessions from the current project path
-                        if session_id and project == self.project_path:
-                            # Keep only the most recent entry for each session
-                            sessions[session_id] = {
-                                'session_id': session_id,
-                                'display': entry.get('display', '')[:100],
-                                'project': project,
-                                'timestamp': entry.get('timestamp', 0)
-                            }
                     except json.JSONDecodeError:
                         continue
+                    finally:
+                        parse_seconds += time.perf_counter() - parse_started
+
+                    session_id = entry.get('sessionId')
+                    project = entry.get('project', '')
+
+                    # ONLY include sessions from the current project path
+                    if session_id and project == self.project_path:
+                        # Keep only the most recent entry for each session
+                        sessions[session_id] = {
+                            'session_id': session_id,
+                            'display': entry.get('display', '')[:100],
+                            'project': project,
+                            'timestamp': entry.get('timestamp', 0)
+                        }
+            add_timing("parse", parse_seconds)
+            add_timing("store", time.perf_counter() - started - parse_seconds)
 
             # Sort by timestamp, most recent first
             sorted_sessions = sorted(sessions.values(), key=lambda x: x['timestamp'], reverse=True)
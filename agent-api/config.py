@@ -1,4 +1,5 @@
 import os
+import json
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -11,6 +12,14 @@ class Config:
     AUTH_USERNAME: str = os.getenv("AUTH_USERNAME", "")
     AUTH_PASSWORD: str = os.getenv("AUTH_PASSWORD", "")
 
+    # Users allowed to call /api/admin/* (comma-separated, defaults to AUTH_USERNAME)
+    ADMIN_USERNAMES: list = [
+        name.strip() for name in (os.getenv("ADMIN_USERNAMES") or AUTH_USERNAME).split(",") if name.strip()
+    ]
+
+    # Longest on-demand profile allowed via /api/admin/profile
+    PROFILE_MAX_SECONDS: int = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
     # Agent project path - the project you want to give remote access to
     # Set via CLAUDE_PROJECT_PATH in .env
     PROJECT_PATH: str = os.getenv("CLAUDE_PROJECT_PATH", os.getcwd())
@@ -18,9 +27,67 @@ class Config:
     # Agent CLI command (defaults to 'claude' for Claude Code)
     AGENT_CLI_COMMAND: str = os.getenv("AGENT_CLI_COMMAND", "claude")
 
+    # Agent backends - JSON list of {"name", "type", "command"} (empty = one
+    # Claude CLI backend running AGENT_CLI_COMMAND)
+    AGENT_BACKENDS: list = json.loads(os.getenv("AGENT_BACKENDS") or "[]")
+
+    # Backend routing - JSON {"<project path>" or "default": {"backends": [names], "strategy": ...}}
+    AGENT_ROUTES: dict = json.loads(os.getenv("AGENT_ROUTES") or "{}")
+    BACKEND_STRATEGY: str = os.getenv("BACKEND_STRATEGY", "least_loaded")  # or "fastest"
+    BACKEND_COOLDOWN_SECONDS: float = float(os.getenv("BACKEND_COOLDOWN_SECONDS", "60"))
+
+    # Async tasks running longer than this fall back to the next backend (0 = no limit)
+    TASK_TIMEOUT_SECONDS: int = int(os.getenv("TASK_TIMEOUT_SECONDS", "0"))
+
     # Session storage
     SESSION_FILE: str = os.path.join(os.getcwd(), "sessions", "sessions.json")
 
+    # Async task output - append-only NDJSON event logs, one per task
+    TASK_OUTPUT_DIR: str = os.getenv("TASK_OUTPUT_DIR", "/tmp")
+    OUTPUT_CHUNK_BYTES: int = int(os.getenv("OUTPUT_CHUNK_BYTES", str(1024 * 1024)))
+
+    # Completed task responses, written once in their final wire format
+    TASK_RESULT_DIR: str = os.getenv("TASK_RESULT_DIR", "/tmp/agent-task-results")
+
+    # Nginx internal location serving TASK_RESULT_DIR via X-Accel-Redirect
+    # (empty = agent-api streams result files itself; start_all.sh sets it)
+    ACCEL_REDIRECT_PREFIX: str = os.getenv("ACCEL_REDIRECT_PREFIX", "")
+
+    # Usage budget - rolling counters and spending limits (0 = unlimited)
+    USAGE_FILE: str = os.path.join(os.getcwd(), "sessions", "usage.json")
+    USAGE_RETENTION_DAYS: int = int(os.getenv("USAGE_RETENTION_DAYS", "30"))
+    BUDGET_DAILY_USD: float = float(os.getenv("BUDGET_DAILY_USD", "0"))
+    BUDGET_USER_DAILY_USD: float = float(os.getenv("BUDGET_USER_DAILY_USD", "0"))
+    BUDGET_SESSION_USD: float = float(os.getenv("BUDGET_SESSION_USD", "0"))
+
+    # Completion notifications - webhooks and Web Push
+    NOTIFY_FILE: str = os.path.join(os.getcwd(), "sessions", "notifications.json")
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+    NOTIFY_BACKOFF_SECONDS: float = float(os.getenv("NOTIFY_BACKOFF_SECONDS", "2"))
+    NOTIFY_TIMEOUT_SECONDS: float = float(os.getenv("NOTIFY_TIMEOUT_SECONDS", "10"))
+    NOTIFY_WEBHOOK_SECRET: str = os.getenv("NOTIFY_WEBHOOK_SECRET", "")
+    # Webhook hosts allowed even though they resolve to loopback/private addresses (comma-separated)
+    NOTIFY_ALLOWED_HOSTS: list = [
+        host.strip() for host in os.getenv("NOTIFY_ALLOWED_HOSTS", "").split(",") if host.strip()
+    ]
+    VAPID_PUBLIC_KEY: str = os.getenv("VAPID_PUBLIC_KEY", "")
+    VAPID_PRIVATE_KEY: str = os.getenv("VAPID_PRIVATE_KEY", "")
+    VAPID_SUBJECT: str = os.getenv("VAPID_SUBJECT", "mailto:admin@example.com")
+
+    # Running async tasks, shared between an old and a new agent-api process during restarts
+    TASKS_FILE: str = os.path.join(os.getcwd(), "sessions", "tasks.json")
+
+    # Graceful drain - how long running tasks may finish before they are handed off,
+    # and how often a process looks for handed-off tasks to adopt
+    DRAIN_DEADLINE_SECONDS: int = int(os.getenv("DRAIN_DEADLINE_SECONDS", "300"))
+    ADOPT_INTERVAL_SECONDS: float = float(os.getenv("ADOPT_INTERVAL_SECONDS", "2"))
+
+    # Written by the server itself so a restarted successor replaces the PID (empty = off)
+    PID_FILE: str = os.getenv("AGENT_API_PID_FILE", "")
+
+    # Cap on agent turns per task, passed as --max-turns (0 = no cap)
+    MAX_TURNS: int = int(os.getenv("MAX_TURNS", "0"))
+
     # Agent API Server
     AGENT_API_HOST: str = os.getenv("AGENT_API_HOST", "127.0.0.1")
     AGENT_API_PORT: int = int(os.getenv("AGENT_API_PORT", "8001"))
@@ -0,0 +1,296 @@
+import fcntl
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this PID exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def process_start_time(pid: int) -> Optional[int]:
+    """
+    Start time of a process in clock ticks since boot, from /proc/<pid>/stat
+
+    Together with the PID this identifies a process - a PID reused by a
+    later process comes with a different start time.
+
+    Returns:
+        Start time, or None if the process is gone or /proc is not available
+    """
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name (field 2) may contain spaces - count fields after its closing parenthesis
+    return int(stat.rsplit(")", 1)[1].split()[19])
+
+def process_alive(pid: int, start_time: Optional[int]) -> bool:
+    """
+    Whether the process recorded with this PID and start time is still running
+
+    Falls back to a plain PID check when either start time is unknown.
+    """
+    if not pid_alive(pid):
+        return False
+    if start_time is None:
+        return True
+    current = process_start_time(pid)
+    return current is None or current == start_time
+
+class AdoptedProcess:
+    """
+    Popen-like handle for a task process started by another agent-api process
+
+    Supports just what the task watcher needs - wait() and kill(). The exit
+    code of a process that is not our child is unknown, so wait() returns None.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, pid: int, started: float, start_time: Optional[int] = None):
+        """
+        Initialize handle
+
+        Args:
+            pid: Task process ID
+            started: Wall-clock time the process was launched (timeouts count from here)
+            start_time: Process start time from process_start_time(), so a reused PID is not mistaken for the task
+        """
+        self.pid = pid
+        self.started = started
+        self.start_time = start_time
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the process to exit
+
+        Raises:
+            subprocess.TimeoutExpired: If it runs longer than timeout seconds since launch
+        """
+        deadline = self.started + timeout if timeout else None
+        while process_alive(self.pid, self.start_time):
+            if deadline is not None and time.time() >= deadline:
+                raise subprocess.TimeoutExpired(str(self.pid), timeout)
+            time.sleep(self.POLL_INTERVAL)
+        return None
+
+    def kill(self):
+        """Kill the process if it is still running"""
+        if not process_alive(self.pid, self.start_time):
+            # Exited - the PID may belong to an unrelated process by now
+            return
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+class TaskRegistry:
+    """
+    Running async tasks, shared between agent-api processes
+
+    Every task records the process that owns it - the one watching it and
+    booking its usage when it ends. A draining process releases its tasks
+    and a successor (or the next start) adopts them, together with tasks of
+    processes that died. Entries live in a small JSON file guarded by flock.
+    PIDs are stored with their process start time, so a PID reused after a
+    crash is not mistaken for the process that held it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize registry
+
+        Args:
+            path: JSON file holding running tasks
+        """
+        self.path = Path(path)
+        self.owner = os.getpid()
+        self.owner_start_time = process_start_time(self.owner)
+
+    def _read(self) -> dict:
+        """Read all entries (writes are atomic, so no lock is needed)"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    @contextmanager
+    def _update(self):
+        """Read-modify-write entries under an exclusive lock shared by all processes"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            tasks = self._read()
+            yield tasks
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(tasks, f)
+            tmp_path.replace(self.path)
+
+    def add(self, task_id: str, **info):
+        """
+        Register a task owned by this process
+
+        Args:
+            task_id: Task ID
+            **info: pid, backend, fallbacks, message, username, session_id, notify_url, started
+        """
+        if "pid" in info:
+            info["pid_start_time"] = process_start_time(info["pid"])
+        with self._update() as tasks:
+            tasks[task_id] = dict(info, owner=self.owner, owner_start_time=self.owner_start_time)
+
+    def update(self, task_id: str, **fields):
+        """Update an owned task (e.g. after falling back to another backend)"""
+        if "pid" in fields:
+            fields["pid_start_time"] = process_start_time(fields["pid"])
+        with self._update() as tasks:
+            if tasks.get(task_id, {}).get("owner") == self.owner:
+                tasks[task_id].update(fields)
+
+    def owns(self, task_id: str) -> bool:
+        """Whether this process is responsible for a task"""
+        return self._read().get(task_id, {}).get("owner") == self.owner
+
+    def owned(self) -> List[str]:
+        """IDs of running tasks owned by this process"""
+        return [task_id for task_id, info in self._read().items() if info.get("owner") == self.owner]
+
+    def finish(self, task_id: str) -> bool:
+        """
+        Remove a finished task
+
+        Returns:
+            True if this process owned it (and should book usage and notify)
+        """
+        with self._update() as tasks:
+            if tasks.get(task_id, {}).get("owner") != self.owner:
+                return False
+            del tasks[task_id]
+            return True
+
+    def release(self) -> List[str]:
+        """Hand all owned tasks over to whichever process adopts them next"""
+        with self._update() as tasks:
+            released = [task_id for task_id, info in tasks.items() if info.get("owner") == self.owner]
+            for task_id in released:
+                tasks[task_id]["owner"] = None
+        return released
+
+    def claim_orphans(self) -> List[Tuple[str, dict]]:
+        """
+        Take ownership of released tasks and tasks of processes that died
+
+        Returns:
+            List of (task_id, info) now owned by this process
+        """
+        if not any(info.get("owner") != self.owner for info in self._read().values()):
+            return []
+
+        claimed = []
+        with self._update() as tasks:
+            for task_id, info in tasks.items():
+                owner = info.get("owner")
+                if owner is None or (owner != self.owner and not process_alive(owner, info.get("owner_start_time"))):
+                    info["owner"] = self.owner
+                    info["owner_start_time"] = self.owner_start_time
+                    claimed.append((task_id, dict(info)))
+        return claimed
+
+class DrainController:
+    """
+    Graceful drain of one agent-api process
+
+    While draining the process reports not-ready and rejects submissions.
+    Running tasks get until the deadline to finish; whatever still runs
+    then is released in the task registry for a successor to adopt - the
+    agent processes themselves keep running. is_idle, if set, must also
+    report true before the deadline ends the wait (main.py uses it for
+    watcher threads and notification deliveries of finished tasks).
+    on_drained is called last (main.py uses it to stop the server).
+    """
+
+    def __init__(self, registry: TaskRegistry, deadline: float, poll_interval: float = 1.0):
+        """
+        Initialize drain controller
+
+        Args:
+            registry: Shared task registry
+            deadline: Seconds running tasks may take to finish
+            poll_interval: Seconds between checks for finished tasks
+        """
+        self.registry = registry
+        self.deadline = deadline
+        self.poll_interval = poll_interval
+        self.on_drained: Optional[Callable[[], None]] = None
+        self.is_idle: Optional[Callable[[], bool]] = None
+        self.draining = False
+        self.deadline_at: Optional[float] = None
+        self.successor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def begin(self, successor_pid: Optional[int] = None) -> bool:
+        """
+        Start draining (no-op if already draining)
+
+        Args:
+            successor_pid: New process taking over the listening socket, if any
+
+        Returns:
+            True if this call started the drain
+        """
+        with self._lock:
+            if self.draining:
+                return False
+            self.draining = True
+            self.deadline_at = time.time() + self.deadline
+            self.successor_pid = successor_pid
+
+        print(f"Draining: {len(self.registry.owned())} running task(s), deadline {self.deadline}s")
+        threading.Thread(target=self._run, daemon=True).start()
+        return True
+
+    def _run(self):
+        """Wait for owned tasks (and their follow-up work) to finish, then hand off the rest"""
+        while (self.registry.owned() or not self._idle()) and time.time() < self.deadline_at:
+            time.sleep(self.poll_interval)
+
+        released = self.registry.release()
+        if released:
+            print(f"Drain deadline reached, handed off {len(released)} task(s): {', '.join(released)}")
+        self._done.set()
+        if self.on_drained:
+            self.on_drained()
+
+    def _idle(self) -> bool:
+        """Whether background work outside the registry is done"""
+        return self.is_idle is None or self.is_idle()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the drain has finished"""
+        return self._done.wait(timeout)
+
+    def status(self) -> dict:
+        """Drain state for the admin API"""
+        return {
+            "draining": self.draining,
+            "running_tasks": len(self.registry.owned()),
+            "deadline_at": self.deadline_at,
+            "successor_pid": self.successor_pid,
+            "drained": self._done.is_set(),
+        }
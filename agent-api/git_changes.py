@@ -0,0 +1,303 @@
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from config import config
+
+# Tree of an empty repository (used as the "before" of a first commit)
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# Serializes end snapshots so a summary is only ever computed once
+_lock = threading.Lock()
+
+# Object directory of each project, looked up once
+_project_objects: Dict[str, str] = {}
+
+def task_changes_path(task_id: str) -> str:
+    """Path of the git snapshot/change summary file for a task"""
+    return os.path.join(config.TASK_OUTPUT_DIR, f"claude_task_{task_id}.changes.json")
+
+def objects_dir() -> str:
+    """Private object store for snapshot blobs and trees (shared by all tasks)"""
+    return os.path.join(config.TASK_OUTPUT_DIR, "git-objects")
+
+def _objects_env(repo: str) -> dict:
+    """
+    Environment that writes new objects to the private store
+
+    The project's own objects stay readable as an alternate, so snapshots
+    can be diffed against its commits without adding anything to it.
+    """
+    if repo not in _project_objects:
+        path = _git(repo, "rev-parse", "--git-path", "objects", private=False).strip()
+        _project_objects[repo] = os.path.join(repo, path)
+    os.makedirs(objects_dir(), exist_ok=True)
+    return dict(
+        os.environ,
+        GIT_OBJECT_DIRECTORY=objects_dir(),
+        GIT_ALTERNATE_OBJECT_DIRECTORIES=_project_objects[repo]
+    )
+
+def _git(repo: str, *args: str, input: Optional[str] = None, check: bool = True, private: bool = True) -> str:
+    """
+    Run a git command in the repository and return its stdout
+
+    Optional locks are skipped so read-only commands like status never take
+    index.lock away from the agent working in the same tree.
+
+    Args:
+        private: Write objects to the private store instead of the project's
+    """
+    result = subprocess.run(
+        ["git", "--no-optional-locks", *args],
+        cwd=repo,
+        input=input,
+        capture_output=True,
+        text=True,
+        check=check,
+        env=_objects_env(repo) if private else None
+    )
+    return result.stdout
+
+def _hash_files(repo: str, paths: list) -> list:
+    """Store working tree files as blobs (so later diffs still see them) and return their IDs"""
+    if not paths:
+        return []
+    return _git(repo, "hash-object", "-w", "--stdin-paths", input="\n".join(paths) + "\n").split()
+
+def snapshot(repo: str) -> Optional[dict]:
+    """
+    Capture the git state of a working tree
+
+    Records HEAD, the index tree and the content of every dirty or untracked
+    file. Dirty file contents are written to a private object store under
+    TASK_OUTPUT_DIR (never the project's), so the state can be diffed after
+    the working tree has moved on. Hashing reads every dirty file, so large
+    dirty trees make this slower.
+
+    Args:
+        repo: Working tree path
+
+    Returns:
+        Snapshot dict, or None if the path is not inside a git working tree
+    """
+    try:
+        if _git(repo, "rev-parse", "--is-inside-work-tree", check=False, private=False).strip() != "true":
+            return None
+    except OSError:
+        # git not installed
+        return None
+
+    head = _git(repo, "rev-parse", "--verify", "-q", "HEAD", check=False).strip() or None
+    # Index tree changes whenever something is staged; unmerged indexes cannot be written
+    index = _git(repo, "write-tree", check=False).strip() or None
+
+    status = _git(repo, "status", "--porcelain=v1", "-z", "--untracked-files=all", "--no-renames")
+    present, deleted = [], []
+    for entry in status.split("\0"):
+        if len(entry) < 4:
+            continue
+        path = entry[3:]
+        full_path = os.path.join(repo, path)
+        if os.path.isdir(full_path):
+            # Dirty submodule - not tracked at file level
+            continue
+        (present if os.path.lexists(full_path) else deleted).append(path)
+
+    dirty = dict(zip(present, _hash_files(repo, present)))
+    dirty.update({path: None for path in deleted})
+    fingerprint = hashlib.sha1(json.dumps(sorted(dirty.items())).encode()).hexdigest()
+
+    return {
+        "head": head,
+        "index": index,
+        "dirty": dirty,
+        "fingerprint": fingerprint,
+        "taken_at": time.time()
+    }
+
+def _blobs(repo: str, state: dict, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Blob ID of each path in a snapshot (None if the file did not exist)"""
+    blobs = {path: state["dirty"][path] for path in paths if path in state["dirty"]}
+    clean = sorted(set(paths) - set(blobs))
+    if clean and state["head"]:
+        listing = _git(repo, "ls-tree", "-z", state["head"], "--", *clean)
+        for entry in listing.split("\0"):
+            if "\t" in entry:
+                info, path = entry.split("\t", 1)
+                blobs[path] = info.split()[2]
+    return {path: blobs.get(path) for path in paths}
+
+def compute_changes(repo: str, start: dict, end: dict) -> dict:
+    """
+    Summarize what changed between two snapshots of the same working tree
+
+    Args:
+        repo: Working tree path
+        start: Snapshot taken when the task started
+        end: Snapshot taken when the task finished
+
+    Returns:
+        Dict with new commits, changed files (status, diffstat and blob IDs) and totals
+    """
+    summary = {
+        "head_before": start["head"],
+        "head_after": end["head"],
+        "commits": [],
+        "files": [],
+        "insertions": 0,
+        "deletions": 0
+    }
+    if (start["head"], start["index"], start["fingerprint"]) == (end["head"], end["index"], end["fingerprint"]):
+        return summary
+
+    paths = set(start["dirty"]) | set(end["dirty"])
+    if start["head"] != end["head"] and end["head"]:
+        base = start["head"] or EMPTY_TREE
+        names = _git(repo, "diff", "--name-only", "-z", "--no-renames", base, end["head"])
+        paths.update(name for name in names.split("\0") if name)
+
+        log_range = f"{start['head']}..{end['head']}" if start["head"] else end["head"]
+        for line in _git(repo, "log", "--format=%H%x00%s", log_range).splitlines():
+            sha, subject = line.split("\0", 1)
+            summary["commits"].append({"sha": sha, "subject": subject})
+
+    before = _blobs(repo, start, paths)
+    after = _blobs(repo, end, paths)
+    empty_blob = _git(repo, "hash-object", "-w", "--stdin", input="").strip()
+
+    for path in sorted(p for p in paths if before[p] != after[p]):
+        a, b = before[path] or empty_blob, after[path] or empty_blob
+        added, removed = _git(repo, "diff", "--numstat", a, b).split("\t")[:2]
+        binary = added == "-"
+        entry = {
+            "path": path,
+            "status": "added" if before[path] is None else "deleted" if after[path] is None else "modified",
+            "insertions": 0 if binary else int(added),
+            "deletions": 0 if binary else int(removed),
+            "binary": binary,
+            "before": before[path],
+            "after": after[path]
+        }
+        summary["files"].append(entry)
+        summary["insertions"] += entry["insertions"]
+        summary["deletions"] += entry["deletions"]
+
+    return summary
+
+def _write(task_id: str, record: dict):
+    """Write a task's change record atomically"""
+    path = task_changes_path(task_id)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+
+def load_changes(task_id: str) -> Optional[dict]:
+    """Load a task's change record, or None if changes are not tracked for it"""
+    try:
+        with open(task_changes_path(task_id), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _overlapping(task_id: str, record: dict) -> bool:
+    """
+    Whether another task worked in the same tree while this one ran
+
+    Snapshots cover the whole working tree, so edits made by an overlapping
+    task show up in this task's summary too.
+    """
+    started, ended = record["start"]["taken_at"], record["end"]["taken_at"]
+    for path in glob.glob(os.path.join(config.TASK_OUTPUT_DIR, "claude_task_*.changes.json")):
+        if path == task_changes_path(task_id):
+            continue
+        try:
+            with open(path, 'r') as f:
+                other = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if other.get("repo") != record["repo"]:
+            continue
+        # Tasks without an end snapshot are still running
+        other_ended = other.get("end", {}).get("taken_at", float("inf"))
+        if other["start"]["taken_at"] < ended and other_ended > started:
+            return True
+    return False
+
+def record_start(task_id: str, repo: str) -> bool:
+    """
+    Snapshot the working tree before a task starts
+
+    Args:
+        task_id: Task ID
+        repo: Project path the task runs in
+
+    Returns:
+        True if changes will be tracked (project is a git working tree)
+    """
+    try:
+        start = snapshot(repo)
+    except subprocess.CalledProcessError as e:
+        print(f"Git snapshot failed for task {task_id}: {e.stderr.strip()}")
+        return False
+    if start is None:
+        return False
+    _write(task_id, {"repo": repo, "start": start})
+    return True
+
+def record_end(task_id: str) -> Optional[dict]:
+    """
+    Snapshot the working tree after a task and compute its change summary once
+
+    Safe to call repeatedly (the watcher calls it on exit, the API lazily if
+    the watcher was lost) - later calls return the cached summary.
+
+    Args:
+        task_id: Task ID
+
+    Returns:
+        Change record with start, end and changes, or None if not tracked
+    """
+    with _lock:
+        record = load_changes(task_id)
+        if record is None or "changes" in record:
+            return record
+        try:
+            end = snapshot(record["repo"])
+            if end is None:
+                return None
+            record["end"] = end
+            record["changes"] = compute_changes(record["repo"], record["start"], end)
+            record["changes"]["overlapping"] = _overlapping(task_id, record)
+        except subprocess.CalledProcessError as e:
+            print(f"Git change summary failed for task {task_id}: {e.stderr.strip()}")
+            return None
+        _write(task_id, record)
+        return record
+
+def file_diff(record: dict, path: str) -> Optional[str]:
+    """
+    Unified diff of one changed file, generated on demand from stored blobs
+
+    Args:
+        record: Completed change record from record_end()
+        path: Repository-relative path from the change summary
+
+    Returns:
+        Diff text, or None if the task did not change that file
+    """
+    entry = next((f for f in record["changes"]["files"] if f["path"] == path), None)
+    if entry is None:
+        return None
+    repo = record["repo"]
+    empty_blob = _git(repo, "hash-object", "-w", "--stdin", input="").strip()
+    a, b = entry["before"] or empty_blob, entry["after"] or empty_blob
+    diff = _git(repo, "diff", a, b)
+    # Blob-to-blob diffs are labelled with object IDs - show the file path instead
+    return diff.replace(f"a/{a}", f"a/{path}", 2).replace(f"b/{b}", f"b/{path}", 2)
@@ -1,23 +1,83 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Response
+from fastapi.responses import PlainTextResponse, FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import uvicorn
 import subprocess
 import uuid
 import os
 import json
+import threading
+import time
+import asyncio
+import signal
+import socket
+import sys
 from pathlib import Path
+from dotenv import dotenv_values
 
 from config import config
-from auth import verify_auth
+from auth import verify_auth, verify_admin
 from claude_wrapper import ClaudeWrapper
+from budget import UsageStore, BudgetExceededError
+from task_output import (
+    task_log_path, task_stderr_path, task_result_path, read_chunk, read_result, last_line, iter_lines_reversed,
+    append_event, append_error_result, write_result_file
+)
+from notifications import NotificationTargets, NotificationDispatcher, validate_webhook_url
+from profiling import ServerTimingMiddleware, sample_stacks, timed
+from backends import AgentBackend, BackendRouter, load_backends
+from git_changes import task_changes_path, record_start, record_end, load_changes, file_diff
+from drain import TaskRegistry, DrainController, AdoptedProcess
 
 # Validate configuration on startup
 config.validate()
 
+# Initialize agent backends and routing
+backends = load_backends(config.AGENT_BACKENDS, config.AGENT_CLI_COMMAND, config.MAX_TURNS)
+backend_router = BackendRouter(
+    backends,
+    routes=config.AGENT_ROUTES,
+    strategy=config.BACKEND_STRATEGY,
+    cooldown=config.BACKEND_COOLDOWN_SECONDS
+)
+
 # Initialize Claude wrapper with configured project path
-claude_wrapper = ClaudeWrapper(project_path=config.PROJECT_PATH)
+claude_wrapper = ClaudeWrapper(project_path=config.PROJECT_PATH, backend=backends[0])
+
+# Initialize usage counters and spending limits
+usage_store = UsageStore(
+    path=config.USAGE_FILE,
+    retention_days=config.USAGE_RETENTION_DAYS,
+    daily_limit=config.BUDGET_DAILY_USD,
+    user_daily_limit=config.BUDGET_USER_DAILY_USD,
+    session_limit=config.BUDGET_SESSION_USD
+)
+
+# Initialize completion notifications
+notification_targets = NotificationTargets(config.NOTIFY_FILE)
+notification_dispatcher = NotificationDispatcher(
+    targets=notification_targets,
+    max_attempts=config.NOTIFY_MAX_ATTEMPTS,
+    backoff=config.NOTIFY_BACKOFF_SECONDS,
+    timeout=config.NOTIFY_TIMEOUT_SECONDS,
+    webhook_secret=config.NOTIFY_WEBHOOK_SECRET,
+    vapid_private_key=config.VAPID_PRIVATE_KEY,
+    vapid_subject=config.VAPID_SUBJECT,
+    allowed_hosts=config.NOTIFY_ALLOWED_HOSTS
+)
+
+# Initialize running-task registry and graceful drain
+task_registry = TaskRegistry(config.TASKS_FILE)
+drain_controller = DrainController(task_registry, config.DRAIN_DEADLINE_SECONDS)
+# A finished task's watcher still books usage and notifies - a drain waits for it
+watcher_threads: List[threading.Thread] = []
+watcher_lock = threading.Lock()
+
+# uvicorn server and listening socket - set by main(), None when imported (e.g. tests)
+server = None
+listen_socket = None
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,12 +94,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Offset", "X-Task-Status", "Server-Timing", "Retry-After"],
 )
 
+# Break every response down into auth/store/parse/handler time
+app.add_middleware(ServerTimingMiddleware)
+
 # Request/Response models
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
+    notify_url: Optional[str] = None  # Per-task webhook called on completion (async only)
+    backend: Optional[str] = None  # Preferred backend name (others remain as fallbacks)
 
 class ChatResponse(BaseModel):
     response: str
@@ -57,10 +123,292 @@ class TaskStatusResponse(BaseModel):
     status: str  # "processing", "completed", "not_found"
     result: Optional[dict] = None
 
+class WebhookTarget(BaseModel):
+    url: str
+
+class PushSubscription(BaseModel):
+    endpoint: str
+    keys: dict
+    expirationTime: Optional[float] = None
+
+def _route(preferred: Optional[str]) -> List[AgentBackend]:
+    """Order backends for a request, rejecting unknown backend names with 400"""
+    try:
+        return backend_router.candidates(config.PROJECT_PATH, preferred)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown backend: {preferred}")
+
+def _launch(candidates: List[AgentBackend], message: str, session_id: Optional[str], task_id: str):
+    """
+    Start a task on the first backend that launches
+
+    Args:
+        candidates: Backends in routing order
+        message: User's message/prompt
+        session_id: Session to resume (None for new session)
+        task_id: Task whose event log (stdout) and stderr file the process appends to
+
+    Returns:
+        Tuple of (process, backend, remaining fallback backends)
+
+    Raises:
+        OSError: If no backend could be started
+    """
+    log_file = task_log_path(task_id)
+    error = OSError("No agent backend configured")
+    for index, backend in enumerate(candidates):
+        args = backend.build_args(message, session_id, stream=True)
+        try:
+            # stderr goes to its own file so the event log stays pure NDJSON
+            with open(log_file, 'ab') as f, open(task_stderr_path(task_id), 'ab') as err:
+                # Own session so the task survives agent-api restarts and is handed off instead
+                process = subprocess.Popen(
+                    args,
+                    stdout=f,
+                    stderr=err,
+                    cwd=claude_wrapper.project_path,
+                    start_new_session=True
+                )
+        except OSError as e:
+            error = e
+            backend_router.mark_failed(backend)
+            append_event(log_file, {"type": "system", "subtype": "backend_error", "backend": backend.name, "error": str(e)})
+            continue
+        backend_router.begin(backend)
+        return process, backend, candidates[index + 1:]
+    raise error
+
+def _scan_run(log_file: str, backend: AgentBackend):
+    """
+    Inspect the latest run in a task log (events after the last backend_error)
+
+    Returns:
+        Tuple of (canonical result or None, whether the agent made progress)
+    """
+    output, progressed = None, False
+    for line in iter_lines_reversed(log_file):
+        if b"backend_error" in line:
+            try:
+                if json.loads(line).get("subtype") == "backend_error":
+                    # Start of this run - earlier events belong to a failed backend
+                    break
+            except (ValueError, AttributeError):
+                pass
+        if output is None:
+            output = backend.parse_stream_result(line)
+        progressed = progressed or backend.is_progress_event(line)
+    return output, progressed
+
+def _watch_task(process, backend: AgentBackend, fallbacks: List[AgentBackend],
+                task_id: str, message: str, username: str, session_id: Optional[str],
+                notify_url: Optional[str] = None):
+    """
+    Wait for a background task to exit, falling back to the next backend on failure,
+    then book its usage and push a completion event
+
+    Only runs that failed before the agent did anything are retried elsewhere;
+    re-running a prompt after it edited files or advanced the session would
+    apply its changes twice.
+
+    Args:
+        process: Running agent CLI process (Popen, or AdoptedProcess for a handed-off task)
+        backend: Backend the process runs on
+        fallbacks: Backends to retry on if this one errors or times out
+        task_id: Task ID (locates the task log)
+        message: User's message/prompt (resubmitted on fallback)
+        username: User who submitted the task
+        session_id: Session the task was submitted to (None for new session)
+        notify_url: Optional per-task webhook
+    """
+    log_file = task_log_path(task_id)
+
+    while True:
+        started = time.monotonic()
+        failure = None
+        try:
+            returncode = process.wait(timeout=config.TASK_TIMEOUT_SECONDS or None)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            failure = f"timed out after {config.TASK_TIMEOUT_SECONDS} seconds"
+
+        if not task_registry.owns(task_id):
+            # Handed off during a drain - the adopting process finishes it
+            return
+
+        if not os.path.exists(log_file):
+            # Task was cleaned up while running
+            backend_router.end(backend, None, time.monotonic() - started)
+            task_registry.finish(task_id)
+            return
+
+        # Scan back for the result - it need not be the very last line
+        output, progressed = _scan_run(log_file, backend)
+        if output is not None:
+            failure = None
+        elif failure is None:
+            failure = f"exited with code {returncode} without a result"
+        backend_router.end(backend, failure is None, time.monotonic() - started)
+
+        if failure is None:
+            if read_result(log_file) is None:
+                # Backend's final event is not in canonical form - append it
+                append_event(log_file, output)
+            break
+
+        error_event = {"type": "system", "subtype": "backend_error", "backend": backend.name, "error": failure}
+        stderr_file = task_stderr_path(task_id)
+        if os.path.exists(stderr_file):
+            error_event["stderr"] = last_line(stderr_file).decode(errors="replace")
+        append_event(log_file, error_event)
+
+        if progressed:
+            # Agent already acted - do not replay the prompt on another backend
+            output = append_error_result(log_file, f"Agent CLI {failure} after it started working; not retried", session_id)
+            break
+
+        try:
+            process, backend, fallbacks = _launch(fallbacks, message, session_id, task_id)
+            task_registry.update(
+                task_id, pid=process.pid, backend=backend.name,
+                fallbacks=[b.name for b in fallbacks], started=time.time()
+            )
+        except OSError:
+            # No backend produced a result - close the log so pollers stop waiting
+            output = append_error_result(log_file, f"Agent CLI {failure}", session_id)
+            break
+
+    # Summarize git changes before the task shows as completed
+    record_end(task_id)
+
+    # Serialize the response once so every later fetch is a plain file send
+    write_result_file(task_id)
+
+    if not task_registry.finish(task_id):
+        # Handed off meanwhile - usage and notification belong to the new owner
+        return
+
+    if failure is None:
+        usage_store.record(
+            username=username,
+            session_id=output["session_id"] or session_id,
+            cost=output["total_cost_usd"],
+            turns=output["num_turns"]
+        )
+
+    notification_dispatcher.notify(
+        username,
+        {
+            "event": "task.completed",
+            "task_id": task_id,
+            "session_id": output["session_id"] or session_id or "",
+            "is_error": bool(output["is_error"]),
+            "cost": output["total_cost_usd"],
+            "turns": output["num_turns"],
+            "preview": str(output["result"])[:200]
+        },
+        webhooks=[notify_url] if notify_url else None
+    )
+
+def _start_watcher(*args):
+    """Run _watch_task in a background thread that a drain waits for"""
+    thread = threading.Thread(target=_watch_task, args=args, daemon=True)
+    with watcher_lock:
+        watcher_threads[:] = [t for t in watcher_threads if t.is_alive()]
+        thread.start()
+        watcher_threads.append(thread)
+
+def _idle() -> bool:
+    """Whether task watchers and the notifications they queued are done"""
+    with watcher_lock:
+        watching = any(thread.is_alive() for thread in watcher_threads)
+    return not watching and not notification_dispatcher.pending()
+
+def _check_budget(username: str, session_id: Optional[str]):
+    """Reject a submission with 429 if a spending limit has been reached"""
+    try:
+        usage_store.check(username, session_id)
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+def _check_draining():
+    """Reject a submission with 503 while this process drains for a restart"""
+    if drain_controller.draining:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is restarting, retry shortly",
+            headers={"Retry-After": "5"}
+        )
+
+def _adopt_tasks():
+    """Watch tasks handed off by a drained process or left behind by one that died"""
+    for task_id, info in task_registry.claim_orphans():
+        try:
+            backend = backend_router.get(info["backend"])
+        except KeyError:
+            backend = backends[0]
+        fallbacks = [backend_router.get(name) for name in info.get("fallbacks", []) if name in backend_router.backends]
+        print(f"Adopting task {task_id} (PID {info['pid']}, backend {backend.name})")
+
+        backend_router.begin(backend)
+        _start_watcher(
+            AdoptedProcess(info["pid"], info["started"], info.get("pid_start_time")), backend, fallbacks, task_id,
+            info["message"], info["username"], info["session_id"], info.get("notify_url")
+        )
+
+def _adopt_loop():
+    """Keep adopting handed-off tasks until this process drains itself"""
+    while not drain_controller.draining:
+        try:
+            _adopt_tasks()
+        except Exception as e:
+            print(f"Task adoption failed: {e}")
+        time.sleep(config.ADOPT_INTERVAL_SECONDS)
+
+def _spawn_successor() -> int:
+    """
+    Start a new agent-api process on the same listening socket
+
+    The socket is inherited, so connections queued while the successor
+    starts up are accepted by it rather than refused.
+
+    Returns:
+        PID of the successor
+    """
+    fd = listen_socket.fileno()
+    # Drop values that came from .env so the successor re-reads the current file
+    dotenv = dotenv_values()
+    env = {key: value for key, value in os.environ.items() if dotenv.get(key) != value}
+    env["AGENT_API_LISTEN_FD"] = str(fd)
+
+    process = subprocess.Popen(
+        [sys.executable] + sys.argv,
+        env=env,
+        pass_fds=[fd],
+        start_new_session=True
+    )
+    return process.pid
+
+def _start_drain(restart: bool = False):
+    """
+    Drain this process, optionally handing its socket to a successor first
+
+    Args:
+        restart: Start a successor that takes new connections immediately
+    """
+    if drain_controller.draining:
+        return
+    successor_pid = _spawn_successor() if restart else None
+    if drain_controller.begin(successor_pid) and successor_pid:
+        print(f"Restarting: successor PID {successor_pid} takes over the listening socket")
+        server.stop_listening()
+
 # Health check (no auth required)
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
+    """Health check endpoint - not ready (503) while draining"""
+    if drain_controller.draining:
+        return JSONResponse(status_code=503, content={"status": "draining", "service": "agent-api"})
     return {"status": "healthy", "service": "agent-api"}
 
 # Chat endpoint (requires auth)
@@ -76,12 +424,30 @@ async def chat(request: ChatRequest, username: str = Depends(verify_auth)):
     Returns:
         ChatResponse with Claude's response and session info
     """
+    _check_draining()
+    _check_budget(username, request.session_id)
+    candidates = _route(request.backend)
+
     try:
-        # Execute Claude command
-        result = claude_wrapper.execute(
-            message=request.message,
-            session_id=request.session_id  # None = new session, provided = resume that session
-        )
+        # Execute on the best backend, falling back to the next one only if it
+        # failed before the agent acted (as _watch_task does for async tasks)
+        for backend in candidates:
+            with backend_router.track(backend) as run:
+                result = claude_wrapper.execute(
+                    message=request.message,
+                    session_id=request.session_id,  # None = new session, provided = resume that session
+                    backend=backend
+                )
+                run["success"] = result.success
+            if result.success:
+                break
+            if not result.retryable:
+                # Timed out or exited after it started working - report this backend's
+                # error rather than replaying the prompt on the next one
+                break
+
+        if result.success:
+            usage_store.record(username, result.session_id, result.cost, result.turns)
 
         return ChatResponse(
             response=result.response,
@@ -108,29 +474,44 @@ async def submit_chat_task(session_id: str, request: ChatRequest, username: str
     Returns:
         AsyncTaskResponse with task_id for polling
     """
-    task_id = str(uuid.uuid4())
-    output_file = f"/tmp/claude_task_{task_id}.json"
-
-    # Build command
-    args = ["claude", "-p", request.message, "--output-format", "json"]
-
     # Use session_id from path if not "new"
-    if session_id != "new":
-        args.extend(["--resume", session_id])
+    resume_id = session_id if session_id != "new" else None
+    _check_draining()
+    _check_budget(username, resume_id)
+
+    if request.notify_url:
+        try:
+            # Resolves the host - keep DNS off the event loop
+            await asyncio.to_thread(validate_webhook_url, request.notify_url, config.NOTIFY_ALLOWED_HOSTS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    candidates = _route(request.backend)
+    task_id = str(uuid.uuid4())
+    log_file = task_log_path(task_id)
 
-    # Start Claude CLI with output redirected to temp file
+    # Start the agent CLI streaming events into the task log
     try:
-        with open(output_file, 'w') as f:
-            subprocess.Popen(
-                args,
-                stdout=f,
-                stderr=subprocess.STDOUT,
-                cwd=claude_wrapper.project_path
-            )
+        # Snapshot git state so the task's changes can be listed without asking the agent
+        with timed("git"):
+            await asyncio.to_thread(record_start, task_id, claude_wrapper.project_path)
+
+        process, backend, fallbacks = _launch(candidates, request.message, resume_id, task_id)
+        task_registry.add(
+            task_id, pid=process.pid, backend=backend.name, fallbacks=[b.name for b in fallbacks],
+            message=request.message, username=username, session_id=resume_id,
+            notify_url=request.notify_url, started=time.time()
+        )
+
+        # Fall back, book usage and notify once the task exits
+        _start_watcher(process, backend, fallbacks, task_id, request.message, username, resume_id, request.notify_url)
 
         return AsyncTaskResponse(task_id=task_id, status="processing")
 
     except Exception as e:
+        for path in (log_file, task_stderr_path(task_id), task_changes_path(task_id)):
+            if os.path.exists(path):
+                os.remove(path)
         raise HTTPException(status_code=500, detail=f"Failed to start task: {str(e)}")
 
 @app.get("/api/sessions/{session_id}/tasks/{task_id}", response_model=TaskStatusResponse)
@@ -145,30 +526,139 @@ async def get_task_status(session_id: str, task_id: str, username: str = Depends
     Returns:
         TaskStatusResponse with status and result (if completed)
     """
-    output_file = f"/tmp/claude_task_{task_id}.json"
-
-    if not os.path.exists(output_file):
-        return TaskStatusResponse(status="not_found")
+    log_file = task_log_path(task_id)
+    result_file = task_result_path(task_id)
 
-    # Check if file has content
     try:
-        with open(output_file, 'r') as f:
-            content = f.read()
+        if not os.path.exists(result_file):
+            if not os.path.exists(log_file):
+                return TaskStatusResponse(status="not_found")
 
-        if content.strip():
-            # Process finished - parse result
-            result = json.loads(content)
-            return TaskStatusResponse(status="completed", result=result)
-        else:
-            # File exists but empty - still processing
-            return TaskStatusResponse(status="processing")
+            # Written by the task watcher; created here if the watcher was lost (e.g. restart)
+            if write_result_file(task_id) is None:
+                return TaskStatusResponse(status="processing")
 
-    except json.JSONDecodeError:
-        # File has partial content - still writing
-        return TaskStatusResponse(status="processing")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading task status: {str(e)}")
 
+    # Completed responses are already on disk in wire format - hand them to nginx if available
+    if config.ACCEL_REDIRECT_PREFIX:
+        return Response(
+            media_type="application/json",
+            headers={"X-Accel-Redirect": config.ACCEL_REDIRECT_PREFIX + os.path.basename(result_file)}
+        )
+    return FileResponse(result_file, media_type="application/json")
+
+@app.get("/api/sessions/{session_id}/tasks/{task_id}/output")
+async def get_task_output(session_id: str, task_id: str, offset: int = 0, username: str = Depends(verify_auth)):
+    """
+    Fetch task output events from a byte offset
+
+    Reconnecting clients pass the X-Next-Offset value from their last
+    response to fetch only the events they missed.
+
+    Args:
+        session_id: Session ID (for REST hierarchy)
+        task_id: Task ID to read
+        offset: Byte offset to resume from (default: start of output)
+
+    Returns:
+        Newline-delimited JSON events with X-Next-Offset and X-Task-Status headers
+    """
+    log_file = task_log_path(task_id)
+
+    if not os.path.exists(log_file):
+        raise HTTPException(status_code=404, detail="Task not found")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Offset must not be negative")
+
+    try:
+        data, next_offset = read_chunk(log_file, offset, config.OUTPUT_CHUNK_BYTES)
+        # Completed only once the client has everything up to the result event
+        finished = read_result(log_file) is not None and next_offset >= os.path.getsize(log_file)
+        status = "completed" if finished else "processing"
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading task output: {str(e)}")
+
+    return Response(
+        content=data,
+        media_type="application/x-ndjson",
+        headers={"X-Next-Offset": str(next_offset), "X-Task-Status": status}
+    )
+
+async def _task_changes(task_id: str) -> Optional[dict]:
+    """
+    Load a task's change record, computing it if the task finished without one
+
+    Returns:
+        Change record, or None while the task is still running
+
+    Raises:
+        HTTPException: 404 if the task or its change tracking does not exist
+    """
+    if not os.path.exists(task_log_path(task_id)):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    record = load_changes(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Changes are not tracked for this task (project is not a git repository)")
+    if "changes" in record:
+        return record
+    if read_result(task_log_path(task_id)) is None:
+        return None
+
+    # Watcher was lost (e.g. restart) - summarize now
+    with timed("git"):
+        record = await asyncio.to_thread(record_end, task_id)
+    if record is None:
+        raise HTTPException(status_code=500, detail="Failed to compute task changes")
+    return record
+
+@app.get("/api/sessions/{session_id}/tasks/{task_id}/changes")
+async def get_task_changes(session_id: str, task_id: str, username: str = Depends(verify_auth)):
+    """
+    List files the task changed in the project, with diffstat
+
+    Computed once from git snapshots taken when the task started and ended,
+    then served from cache. Snapshots cover the whole working tree, so if
+    another task ran in the same project at the same time its edits are
+    included too - "overlapping" is true in that case.
+
+    Args:
+        session_id: Session ID (for REST hierarchy)
+        task_id: Task ID
+
+    Returns:
+        Status plus new commits, changed files, insertion/deletion totals and overlapping flag
+    """
+    record = await _task_changes(task_id)
+    if record is None:
+        return {"status": "processing"}
+    return {"status": "completed", **record["changes"]}
+
+@app.get("/api/sessions/{session_id}/tasks/{task_id}/changes/diff", response_class=PlainTextResponse)
+async def get_task_file_diff(session_id: str, task_id: str, path: str, username: str = Depends(verify_auth)):
+    """
+    Unified diff of one file changed by the task
+
+    Args:
+        session_id: Session ID (for REST hierarchy)
+        task_id: Task ID
+        path: Repository-relative file path from the change list
+
+    Returns:
+        Diff text
+    """
+    record = await _task_changes(task_id)
+    if record is None:
+        raise HTTPException(status_code=409, detail="Task is still running")
+
+    with timed("git"):
+        diff = await asyncio.to_thread(file_diff, record, path)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="File not changed by this task")
+    return PlainTextResponse(diff, media_type="text/x-diff")
+
 @app.delete("/api/sessions/{session_id}/tasks/{task_id}")
 async def cleanup_task(session_id: str, task_id: str, username: str = Depends(verify_auth)):
     """
@@ -181,11 +671,16 @@ async def cleanup_task(session_id: str, task_id: str, username: str = Depends(ve
     Returns:
         Status message
     """
-    output_file = f"/tmp/claude_task_{task_id}.json"
+    log_file = task_log_path(task_id)
+    result_file = task_result_path(task_id)
 
     try:
-        if os.path.exists(output_file):
-            os.remove(output_file)
+        for path in (result_file, task_stderr_path(task_id), task_changes_path(task_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        if os.path.exists(log_file):
+            os.remove(log_file)
             return {"status": "cleaned"}
         else:
             return {"status": "not_found"}
@@ -201,25 +696,189 @@ async def get_sessions(username: str = Depends(verify_auth)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list sessions: {str(e)}")
 
+# Agent backends with current load and latency
+@app.get("/api/backends")
+async def get_backends(username: str = Depends(verify_auth)):
+    """List configured agent backends with in-flight tasks and average run time"""
+    return {"backends": backend_router.stats()}
+
+# Usage and budget report from pre-aggregated counters
+@app.get("/api/usage")
+async def get_usage(session_id: Optional[str] = None, days: int = 1, username: str = Depends(verify_auth)):
+    """
+    Report spend and turns for the current user, all users and optionally a session
+
+    Args:
+        session_id: Optional session to include in the report
+        days: Number of days to include, ending today (default: today only)
+
+    Returns:
+        Usage totals and configured limits
+    """
+    return usage_store.summary(username, session_id=session_id, days=days)
+
+# Completion notification targets for the current user
+@app.get("/api/notifications")
+async def get_notification_targets(username: str = Depends(verify_auth)):
+    """List the current user's webhooks and push subscriptions"""
+    targets = notification_targets.get(username)
+    return {
+        "webhooks": targets["webhooks"],
+        "push": [s.get("endpoint") for s in targets["push"]],
+        "push_enabled": notification_dispatcher.push_enabled,
+        "vapid_public_key": config.VAPID_PUBLIC_KEY if notification_dispatcher.push_enabled else None
+    }
+
+@app.post("/api/notifications/webhooks")
+async def add_webhook(target: WebhookTarget, username: str = Depends(verify_auth)):
+    """Register a webhook called whenever one of the user's tasks completes"""
+    try:
+        await asyncio.to_thread(validate_webhook_url, target.url, config.NOTIFY_ALLOWED_HOSTS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    notification_targets.add_webhook(username, target.url)
+    return {"status": "registered"}
+
+@app.delete("/api/notifications/webhooks")
+async def remove_webhook(url: str, username: str = Depends(verify_auth)):
+    """Unregister a webhook"""
+    if notification_targets.remove_webhook(username, url):
+        return {"status": "removed"}
+    return {"status": "not_found"}
+
+@app.post("/api/notifications/push")
+async def add_push_subscription(subscription: PushSubscription, username: str = Depends(verify_auth)):
+    """Register a browser Web Push subscription"""
+    if not notification_dispatcher.push_enabled:
+        raise HTTPException(status_code=501, detail="Web Push is not configured on this server")
+    try:
+        await asyncio.to_thread(validate_webhook_url, subscription.endpoint, config.NOTIFY_ALLOWED_HOSTS, True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    notification_targets.add_push(username, subscription.model_dump())
+    return {"status": "registered"}
+
+@app.delete("/api/notifications/push")
+async def remove_push_subscription(endpoint: str, username: str = Depends(verify_auth)):
+    """Unregister a browser Web Push subscription"""
+    if notification_targets.remove_push(username, endpoint):
+        return {"status": "removed"}
+    return {"status": "not_found"}
+
+# On-demand sampling profiler (admin only)
+@app.get("/api/admin/profile", response_class=PlainTextResponse)
+async def profile(seconds: float = 10, interval_ms: float = 5, username: str = Depends(verify_admin)):
+    """
+    Sample all threads of the live process and return collapsed stacks
+
+    The sampler runs in a worker thread, so the event loop keeps serving
+    requests and shows up in the profile when something blocks it.
+
+    Args:
+        seconds: Sampling duration (max PROFILE_MAX_SECONDS)
+        interval_ms: Delay between samples in milliseconds
+
+    Returns:
+        Collapsed-stack file for flamegraph.pl or speedscope
+    """
+    if not 0 < seconds <= config.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {config.PROFILE_MAX_SECONDS}")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"agent-api-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        stacks,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # Config endpoint - provides project path to frontend
 @app.get("/api/config")
 async def get_config():
     """Get configuration including project path (no auth required for basic config)"""
     return {"project_path": config.PROJECT_PATH}
 
+# Graceful drain / zero-downtime restart (admin only)
+@app.post("/api/admin/drain")
+async def drain(restart: bool = False, username: str = Depends(verify_admin)):
+    """
+    Stop taking new tasks and shut down once running tasks are finished or handed off
+
+    Args:
+        restart: Hand the listening socket to a freshly started process first
+
+    Returns:
+        Drain status
+    """
+    if restart and server is None:
+        raise HTTPException(status_code=409, detail="Restart requires agent-api to be started via main.py")
+    _start_drain(restart)
+    return drain_controller.status()
+
+class AgentServer(uvicorn.Server):
+    """
+    uvicorn server that drains on the first SIGTERM and restarts on SIGHUP
+
+    A second SIGTERM (or SIGINT) exits right away; running tasks are still
+    released for the next process to adopt.
+    """
+
+    async def startup(self, sockets=None):
+        self.loop = asyncio.get_running_loop()
+        await super().startup(sockets=sockets)
+
+    def handle_exit(self, sig, frame):
+        if sig in (signal.SIGTERM, signal.SIGHUP) and not drain_controller.draining:
+            _start_drain(restart=sig == signal.SIGHUP)
+            return
+        super().handle_exit(sig, frame)
+
+    def stop_listening(self):
+        """Stop accepting connections; open ones are still served"""
+        self.loop.call_soon_threadsafe(lambda: [s.close() for s in self.servers])
+
+def _listen() -> socket.socket:
+    """Listening socket - inherited from a draining predecessor, or newly bound"""
+    fd = os.environ.pop("AGENT_API_LISTEN_FD", None)
+    if fd:
+        return socket.socket(fileno=int(fd))
+
+    family = socket.AF_INET6 if ":" in config.AGENT_API_HOST else socket.AF_INET
+    return socket.create_server((config.AGENT_API_HOST, config.AGENT_API_PORT), family=family, backlog=2048)
+
 def main():
     """Start the agent API server"""
+    global server, listen_socket
+
     print(f"Starting Agent API Server...")
     print(f"Project path: {config.PROJECT_PATH}")
     print(f"Server URL: http://{config.AGENT_API_HOST}:{config.AGENT_API_PORT}")
     print(f"Authentication: {config.AUTH_USERNAME} / {'*' * len(config.AUTH_PASSWORD)}\n")
 
-    uvicorn.run(
-        app,
-        host=config.AGENT_API_HOST,
-        port=config.AGENT_API_PORT,
-        log_level="info"
-    )
+    listen_socket = _listen()
+    if config.PID_FILE:
+        Path(config.PID_FILE).write_text(f"{os.getpid()}\n")
+
+    server = AgentServer(uvicorn.Config(app, log_level="info"))
+    drain_controller.is_idle = _idle
+    drain_controller.on_drained = lambda: setattr(server, "should_exit", True)
+    # uvicorn only handles SIGINT/SIGTERM itself
+    signal.signal(signal.SIGHUP, lambda sig, frame: server.handle_exit(sig, frame))
+
+    # Pick up tasks handed off by a previous process (or orphaned by a crash)
+    threading.Thread(target=_adopt_loop, daemon=True).start()
+
+    server.run(sockets=[listen_socket])
+
+    # Exited without a full drain (e.g. second SIGTERM) - leave tasks for the next process
+    released = task_registry.release()
+    if released:
+        print(f"Handed off {len(released)} running task(s)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,294 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import socket
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Web Push is optional - install pywebpush and set VAPID keys to enable it
+try:
+    from pywebpush import webpush, WebPushException
+except ImportError:
+    webpush = None
+    WebPushException = Exception
+
+# Upper bound for the delay between delivery attempts
+MAX_BACKOFF_SECONDS = 300
+
+def validate_webhook_url(url: str, allowed_hosts: Iterable[str] = (), https_only: bool = False) -> str:
+    """
+    Check that a webhook target is an absolute HTTP(S) URL on a public host
+
+    Hosts resolving to loopback, private, link-local (cloud metadata) or
+    otherwise reserved addresses are rejected, unless listed in allowed_hosts.
+    Also used for Web Push endpoints, which the server POSTs to the same way.
+
+    Args:
+        url: Webhook URL or push endpoint
+        allowed_hosts: Host names/IPs that may be internal (NOTIFY_ALLOWED_HOSTS)
+        https_only: Reject plain http:// (push services are always HTTPS)
+
+    Raises:
+        ValueError: If the URL is not usable as a webhook target
+    """
+    if https_only and not url.startswith("https://"):
+        raise ValueError("URL must start with https://")
+    if not url.startswith(("http://", "https://")):
+        raise ValueError("Webhook URL must start with http:// or https://")
+
+    host = urlsplit(url).hostname
+    if not host:
+        raise ValueError("Webhook URL has no host")
+    if host in allowed_hosts:
+        return url
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)}
+    except socket.gaierror:
+        raise ValueError(f"Webhook host {host} cannot be resolved")
+
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Webhook host {host} resolves to a non-public address")
+    return url
+
+class NotificationTargets:
+    """
+    Per-user notification targets persisted to a JSON file
+
+    Each user has a list of webhook URLs and a list of Web Push
+    subscriptions (the PushSubscription JSON from the browser).
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize target store
+
+        Args:
+            path: JSON file used to persist targets
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r') as f:
+                self._targets = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._targets = {}
+
+    def _save(self):
+        """Persist targets atomically (caller holds the lock)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._targets, f)
+        tmp_path.replace(self.path)
+
+    def get(self, username: str) -> dict:
+        """Return a copy of a user's webhooks and push subscriptions"""
+        with self._lock:
+            user = self._targets.get(username, {})
+            return {"webhooks": list(user.get("webhooks", [])), "push": list(user.get("push", []))}
+
+    def add_webhook(self, username: str, url: str):
+        """Register a webhook URL for a user (no-op if already registered)"""
+        with self._lock:
+            webhooks = self._targets.setdefault(username, {}).setdefault("webhooks", [])
+            if url not in webhooks:
+                webhooks.append(url)
+                self._save()
+
+    def remove_webhook(self, username: str, url: str) -> bool:
+        """Remove a webhook URL, returning whether it was registered"""
+        with self._lock:
+            webhooks = self._targets.get(username, {}).get("webhooks", [])
+            if url not in webhooks:
+                return False
+            webhooks.remove(url)
+            self._save()
+            return True
+
+    def add_push(self, username: str, subscription: dict):
+        """Register a Web Push subscription, replacing any with the same endpoint"""
+        with self._lock:
+            subscriptions = self._targets.setdefault(username, {}).setdefault("push", [])
+            subscriptions[:] = [s for s in subscriptions if s.get("endpoint") != subscription.get("endpoint")]
+            subscriptions.append(subscription)
+            self._save()
+
+    def remove_push(self, username: str, endpoint: str) -> bool:
+        """Remove a Web Push subscription by endpoint, returning whether it was registered"""
+        with self._lock:
+            subscriptions = self._targets.get(username, {}).get("push", [])
+            remaining = [s for s in subscriptions if s.get("endpoint") != endpoint]
+            if len(remaining) == len(subscriptions):
+                return False
+            subscriptions[:] = remaining
+            self._save()
+            return True
+
+class NotificationDispatcher:
+    """
+    Delivers task events to webhooks and Web Push subscriptions
+
+    Deliveries run as coroutines on a dedicated event loop thread, so callers
+    (task watcher threads) hand off an event and return immediately. Failed
+    deliveries are retried with exponential backoff.
+    """
+
+    def __init__(self, targets: NotificationTargets, max_attempts: int = 5,
+                 backoff: float = 2.0, timeout: float = 10.0,
+                 webhook_secret: str = "", vapid_private_key: str = "",
+                 vapid_subject: str = "", allowed_hosts: Iterable[str] = ()):
+        """
+        Initialize dispatcher
+
+        Args:
+            targets: Per-user notification targets
+            max_attempts: Delivery attempts per target before giving up
+            backoff: Delay before the first retry in seconds, doubled on each retry
+            timeout: HTTP timeout per attempt in seconds
+            webhook_secret: Shared secret for the X-Agent-Signature header (empty = unsigned)
+            vapid_private_key: VAPID private key for Web Push (empty = push disabled)
+            vapid_subject: VAPID subject, e.g. mailto:admin@example.com
+            allowed_hosts: Internal webhook hosts allowed despite resolving to non-public addresses
+        """
+        self.targets = targets
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.webhook_secret = webhook_secret
+        self.vapid_private_key = vapid_private_key
+        self.vapid_subject = vapid_subject
+        self.allowed_hosts = set(allowed_hosts)
+        self._loop = None
+        self._pending = set()
+
+    @property
+    def push_enabled(self) -> bool:
+        """Whether Web Push delivery is available"""
+        return webpush is not None and bool(self.vapid_private_key)
+
+    def start(self):
+        """Start the delivery event loop in a background thread"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+    def notify(self, username: str, event: dict, webhooks: Optional[List[str]] = None) -> Future:
+        """
+        Queue an event for delivery to a user's targets
+
+        Args:
+            username: User whose registered targets receive the event
+            event: JSON-serializable event payload
+            webhooks: Extra per-task webhook URLs
+
+        Returns:
+            Future resolving to the number of successful deliveries
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._dispatch(username, event, webhooks or []), self._loop)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    def pending(self) -> int:
+        """Number of events still being delivered (a draining process waits for them)"""
+        return sum(1 for future in list(self._pending) if not future.done())
+
+    async def _dispatch(self, username: str, event: dict, extra_webhooks: List[str]) -> int:
+        """Deliver one event to every target concurrently"""
+        targets = self.targets.get(username)
+        body = json.dumps(event).encode()
+
+        webhooks = list(dict.fromkeys(targets["webhooks"] + extra_webhooks))
+        deliveries = [self._deliver_webhook(url, body) for url in webhooks]
+        if self.push_enabled:
+            deliveries += [self._deliver_push(username, s, body) for s in targets["push"]]
+
+        if not deliveries:
+            return 0
+        results = await asyncio.gather(*deliveries)
+        return sum(1 for delivered in results if delivered)
+
+    async def _sleep_before_retry(self, attempt: int):
+        """Exponential backoff between attempts"""
+        await asyncio.sleep(min(self.backoff * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS))
+
+    async def _deliver_webhook(self, url: str, body: bytes) -> bool:
+        """POST an event to a webhook, retrying on network errors, 429 and 5xx"""
+        # Re-check at delivery time - DNS may have changed since registration
+        try:
+            await asyncio.to_thread(validate_webhook_url, url, self.allowed_hosts)
+        except ValueError as e:
+            print(f"Webhook delivery to {url} refused: {e}")
+            return False
+
+        headers = {"Content-Type": "application/json"}
+        if self.webhook_secret:
+            signature = hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Agent-Signature"] = f"sha256={signature}"
+
+        error = ""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    response = await client.post(url, content=body, headers=headers)
+                    if response.status_code < 400:
+                        return True
+                    error = f"HTTP {response.status_code}"
+                    if response.status_code < 500 and response.status_code != 429:
+                        # Client errors will not succeed on retry
+                        break
+                except httpx.HTTPError as e:
+                    error = str(e) or type(e).__name__
+
+                if attempt < self.max_attempts:
+                    await self._sleep_before_retry(attempt)
+
+        print(f"Webhook delivery to {url} failed: {error}")
+        return False
+
+    async def _deliver_push(self, username: str, subscription: dict, body: bytes) -> bool:
+        """Send an event as a Web Push message, dropping expired subscriptions"""
+        endpoint = subscription.get("endpoint", "")
+        try:
+            await asyncio.to_thread(validate_webhook_url, endpoint, self.allowed_hosts, True)
+        except ValueError as e:
+            print(f"Web Push delivery to {endpoint} refused: {e}")
+            return False
+
+        error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await asyncio.to_thread(
+                    webpush,
+                    subscription_info=subscription,
+                    data=body.decode(),
+                    vapid_private_key=self.vapid_private_key,
+                    vapid_claims={"sub": self.vapid_subject},
+                    timeout=self.timeout
+                )
+                return True
+            except WebPushException as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status in (404, 410):
+                    # Browser unsubscribed - stop pushing to it
+                    self.targets.remove_push(username, endpoint)
+                    return False
+                error = str(e)
+
+            if attempt < self.max_attempts:
+                await self._sleep_before_retry(attempt)
+
+        print(f"Web Push delivery to {endpoint} failed: {error}")
+        return False
@@ -0,0 +1,148 @@
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+# Per-request timing buckets in milliseconds (None outside a request)
+_timings: ContextVar[Optional[dict]] = ContextVar("server_timings", default=None)
+
+# Only one profile may run at a time
+_profile_lock = threading.Lock()
+
+@contextmanager
+def timed(name: str):
+    """
+    Add the duration of a block to the current request's Server-Timing bucket
+
+    Outside of a request (e.g. in task watcher threads) the block is not timed.
+
+    Args:
+        name: Server-Timing metric name, e.g. "auth", "store", "parse"
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+def add_timing(name: str, seconds: float):
+    """
+    Add a duration measured by the caller to the current request's Server-Timing bucket
+
+    For hot loops where entering timed() per iteration would cost more than
+    the work measured. No-op outside a request.
+
+    Args:
+        name: Server-Timing metric name
+        seconds: Duration to add
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+def format_server_timing(timings: dict, total: float) -> str:
+    """
+    Build a Server-Timing header value
+
+    Args:
+        timings: Milliseconds per metric collected with timed()
+        total: Total milliseconds spent in the app
+
+    Returns:
+        Header value with one entry per metric plus handler and total
+    """
+    handler = max(total - sum(timings.values()), 0.0)
+    entries = [f"{name};dur={dur:.2f}" for name, dur in timings.items()]
+    entries.append(f"handler;dur={handler:.2f}")
+    entries.append(f"total;dur={total:.2f}")
+    return ", ".join(entries)
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header to every HTTP response
+
+    Breaks the request down into the buckets recorded with timed() (auth,
+    store, parse) plus the remaining handler time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(timings, total).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+
+def _frame_label(frame) -> str:
+    """Collapsed-stack label for a frame"""
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}"
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Sample the stacks of all threads in this process
+
+    Runs in the calling thread, which is excluded from the samples. The main
+    thread runs the event loop, so handlers that block it show up directly.
+
+    Args:
+        seconds: How long to sample for
+        interval: Delay between samples in seconds
+
+    Returns:
+        Collapsed stacks ("thread;frame;frame count" per line), ready for
+        flamegraph.pl or speedscope
+
+    Raises:
+        RuntimeError: If another profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+
+    try:
+        own_id = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    finally:
+        _profile_lock.release()
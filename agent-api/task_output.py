@@ -0,0 +1,177 @@
+import json
+import os
+from typing import Iterator, Optional, Tuple
+
+from config import config
+from profiling import timed
+
+# Block size used when scanning a log backwards for its last event
+TAIL_BLOCK_SIZE = 64 * 1024
+
+def task_log_path(task_id: str) -> str:
+    """Path of the append-only NDJSON event log for a task"""
+    return os.path.join(config.TASK_OUTPUT_DIR, f"claude_task_{task_id}.jsonl")
+
+def task_stderr_path(task_id: str) -> str:
+    """Path of the CLI's stderr for a task (kept out of the event log)"""
+    return os.path.join(config.TASK_OUTPUT_DIR, f"claude_task_{task_id}.stderr")
+
+def task_result_path(task_id: str) -> str:
+    """Path of the completed-task response file"""
+    return os.path.join(config.TASK_RESULT_DIR, f"claude_task_{task_id}.json")
+
+def read_chunk(path: str, offset: int, limit: int) -> Tuple[bytes, int]:
+    """
+    Read task output from a byte offset
+
+    Only whole events (newline-terminated lines) are returned, so clients can
+    parse every chunk on its own. Blank lines are skipped (the offset still
+    moves past them). A single event larger than the limit is returned in
+    pieces.
+
+    Args:
+        path: Task log file
+        offset: Byte offset to start reading from
+        limit: Maximum number of bytes to return
+
+    Returns:
+        Tuple of (data, next_offset)
+    """
+    with timed("store"), open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(limit)
+
+    end = data.rfind(b"\n")
+    if end != -1:
+        data = data[:end + 1]
+    elif len(data) < limit:
+        # Partial event still being written - wait for the rest
+        data = b""
+
+    next_offset = offset + len(data)
+    if b"\n\n" in data or data.startswith(b"\n"):
+        data = b"".join(line for line in data.splitlines(keepends=True) if line.strip())
+    return data, next_offset
+
+def iter_lines_reversed(path: str) -> Iterator[bytes]:
+    """Yield the non-empty lines of a file last to first, reading backwards in blocks"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        head = b""
+        while pos > 0:
+            step = min(TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + head).split(b"\n")
+            # First piece may continue in the previous block
+            head = lines.pop(0)
+            for line in reversed(lines):
+                line = line.rstrip(b"\r")
+                if line.strip():
+                    yield line
+        head = head.rstrip(b"\r")
+        if head.strip():
+            yield head
+
+def last_line(path: str) -> bytes:
+    """Return the last non-empty line of a file by seeking backwards from the end"""
+    return next(iter_lines_reversed(path), b"")
+
+def read_result(path: str) -> Optional[dict]:
+    """
+    Return the final result event of a task, if it has finished
+
+    The CLI's stream-json output ends with a single {"type": "result", ...}
+    event carrying the same fields as --output-format json.
+
+    Args:
+        path: Task log file
+
+    Returns:
+        Result event dict, or None while the task is still running
+    """
+    try:
+        with timed("store"):
+            line = last_line(path)
+        with timed("parse"):
+            event = json.loads(line)
+    except (OSError, ValueError):
+        return None
+
+    if isinstance(event, dict) and event.get("type") == "result":
+        return event
+    return None
+
+def append_event(path: str, event: dict):
+    """
+    Append one event to a task log
+
+    Starts on a fresh line if the previous writer died mid-event.
+
+    Args:
+        path: Task log file
+        event: JSON-serializable event
+    """
+    with open(path, 'ab+') as f:
+        f.seek(0, os.SEEK_END)
+        fresh_line = f.tell() == 0
+        if not fresh_line:
+            f.seek(-1, os.SEEK_END)
+            fresh_line = f.read(1) == b"\n"
+        f.write((b"" if fresh_line else b"\n") + json.dumps(event).encode() + b"\n")
+
+def append_error_result(path: str, message: str, session_id: Optional[str] = None) -> dict:
+    """
+    Terminate a task log with a synthetic error result
+
+    Used when the CLI exits without emitting a result event, so pollers see
+    the task as finished instead of processing forever.
+
+    Args:
+        path: Task log file
+        message: Error description
+        session_id: Session the task was submitted to, if known
+
+    Returns:
+        The result event that was appended
+    """
+    event = {
+        "type": "result",
+        "subtype": "error",
+        "is_error": True,
+        "result": message,
+        "session_id": session_id or "",
+        "total_cost_usd": 0.0,
+        "num_turns": 0,
+    }
+    append_event(path, event)
+    return event
+
+def write_result_file(task_id: str) -> Optional[str]:
+    """
+    Write the completed-task response body once, in its final wire format
+
+    The raw result event from the log is embedded as-is, so the result is
+    never re-parsed or re-serialized and can be served straight from disk.
+
+    Args:
+        task_id: Task whose log ends with a result event
+
+    Returns:
+        Path of the response file, or None if the task has not finished
+    """
+    log_file = task_log_path(task_id)
+    if read_result(log_file) is None:
+        return None
+
+    with timed("store"):
+        line = last_line(log_file)
+        result_file = task_result_path(task_id)
+        os.makedirs(config.TASK_RESULT_DIR, exist_ok=True)
+        tmp_file = f"{result_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(b'{"status":"completed","result":' + line + b'}')
+        os.replace(tmp_file, result_file)
+
+    return result_file
@@ -48,6 +48,35 @@ async def serve_js():
         )
     return {"error": "app.js not found"}, 404
 
+# Serve IndexedDB storage helpers used by app.js
+@app.get("/store.js")
+async def serve_store_js():
+    """Serve chat storage script"""
+    js_path = STATIC_DIR / "store.js"
+    if js_path.exists():
+        return FileResponse(
+            js_path,
+            media_type="application/javascript",
+            headers={"Cache-Control": "no-cache"}
+        )
+    return {"error": "store.js not found"}, 404
+
+# Serve service worker from the root so it controls the whole portal
+@app.get("/sw.js")
+async def serve_service_worker():
+    """Serve service worker script"""
+    sw_path = STATIC_DIR / "sw.js"
+    if sw_path.exists():
+        return FileResponse(
+            sw_path,
+            media_type="application/javascript",
+            headers={
+                "Cache-Control": "no-cache",
+                "Service-Worker-Allowed": "/"
+            }
+        )
+    return {"error": "sw.js not found"}, 404
+
 # Serve CSS
 @app.get("/styles.css")
 async def serve_css():
@@ -5,6 +5,21 @@ let totalCost = 0;
 let turnCount = 0;
 let projectPath = '';
 
+// Windowed rendering - only a slice of a long conversation is in the DOM
+const PAGE_SIZE = 50;       // Messages loaded per scroll step
+const MAX_RENDERED = 200;   // Messages kept in the DOM at once
+let hasOlder = false;       // Older messages exist above the window
+let hasNewer = false;       // Newer messages exist below the window
+let loadingWindow = false;
+
+// Outbox delivery - queued messages are resent in order, with backoff while the server is unreachable
+const OUTBOX_RETRY_MIN_MS = 2000;
+const OUTBOX_RETRY_MAX_MS = 60000;
+let flushingOutbox = false;
+let outboxFlushRequested = false;
+let outboxRetryDelay = OUTBOX_RETRY_MIN_MS;
+let outboxRetryTimer = null;
+
 // DOM elements
 const chatContainer = document.getElementById('chat-container');
 const messageInput = document.getElementById('message-input');
@@ -15,6 +30,7 @@ const turnCountEl = document.getElementById('turn-count');
 const totalCostEl = document.getElementById('total-cost');
 const projectInfoEl = document.getElementById('project-info');
 const headerPrompt = document.getElementById('header-prompt');
+const notifyBtn = document.getElementById('notify-btn');
 
 // Get auth credentials from localStorage or prompt
 let authCredentials = localStorage.getItem('auth_credentials');
@@ -30,10 +46,20 @@ document.addEventListener('DOMContentLoaded', async () => {
     updateSessionInfo();
     loadSessions();
     updateSendButtonState();
+    registerServiceWorker();
+    setupPushNotifications();
+
+    // History now lives in IndexedDB - drop the old single-blob copy
+    localStorage.removeItem('chat_history');
+
+    // Send anything queued while offline
+    flushOutbox();
 
     // Event listeners
     sendBtn.addEventListener('click', sendMessage);
     sessionSelect.addEventListener('change', switchSession);
+    chatContainer.addEventListener('scroll', onChatScroll);
+    window.addEventListener('online', flushOutbox);
 
     // Reload sessions when dropdown is opened
     sessionSelect.addEventListener('focus', loadSessions);
@@ -131,6 +157,72 @@ function getAuthHeaders() {
     };
 }
 
+function registerServiceWorker() {
+    // Service worker precaches the app shell so reloads work offline and skip the tunnel
+    if (!('serviceWorker' in navigator)) return;
+
+    navigator.serviceWorker.register('/sw.js').catch(error => {
+        console.warn('Service worker registration failed:', error);
+    });
+}
+
+async function setupPushNotifications() {
+    // Web Push needs a service worker and a server with VAPID keys configured
+    if (!('serviceWorker' in navigator) || !('PushManager' in window)) return;
+
+    try {
+        const registration = await navigator.serviceWorker.ready;
+
+        const response = await fetch(`${AGENT_API_URL}/api/notifications`, {
+            headers: getAuthHeaders()
+        });
+        if (!response.ok) return;
+
+        const data = await response.json();
+        if (!data.push_enabled || !data.vapid_public_key) return;
+
+        const existing = await registration.pushManager.getSubscription();
+        notifyBtn.style.display = 'inline-block';
+        notifyBtn.classList.toggle('active', !!existing);
+
+        // Subscribing must happen in a user gesture for the permission prompt
+        notifyBtn.addEventListener('click', async () => {
+            const subscription = await registration.pushManager.getSubscription();
+            if (subscription) {
+                await fetch(`${AGENT_API_URL}/api/notifications/push?endpoint=${encodeURIComponent(subscription.endpoint)}`, {
+                    method: 'DELETE',
+                    headers: getAuthHeaders()
+                });
+                await subscription.unsubscribe();
+                notifyBtn.classList.remove('active');
+                return;
+            }
+
+            if (await Notification.requestPermission() !== 'granted') return;
+
+            const newSubscription = await registration.pushManager.subscribe({
+                userVisibleOnly: true,
+                applicationServerKey: urlBase64ToUint8Array(data.vapid_public_key)
+            });
+            const subscribeResponse = await fetch(`${AGENT_API_URL}/api/notifications/push`, {
+                method: 'POST',
+                headers: getAuthHeaders(),
+                body: JSON.stringify(newSubscription.toJSON())
+            });
+            notifyBtn.classList.toggle('active', subscribeResponse.ok);
+        });
+    } catch (error) {
+        console.warn('Push notifications unavailable:', error);
+    }
+}
+
+function urlBase64ToUint8Array(base64String) {
+    const padding = '='.repeat((4 - base64String.length % 4) % 4);
+    const base64 = (base64String + padding).replace(/-/g, '+').replace(/_/g, '/');
+    const raw = atob(base64);
+    return Uint8Array.from(raw, c => c.charCodeAt(0));
+}
+
 function updateSendButtonState() {
     // Disable send button if no session selected
     const hasSession = sessionId !== null && sessionId !== '';
@@ -155,15 +247,104 @@ async function sendMessage() {
         return;
     }
 
+    const targetSessionId = sessionId;
+
     // Add user message to chat immediately
-    addMessage('user', message);
+    addMessage('user', message, targetSessionId);
 
     // Clear input
     messageInput.value = '';
 
+    // Offline - keep the message in the outbox and send it on reconnect
+    if (!navigator.onLine) {
+        await queueMessage(targetSessionId, message);
+        return;
+    }
+
+    setInputState(false, 'AI is thinking...');
+
+    const retry = await runTask(targetSessionId, message);
+    if (retry) {
+        await queueMessage(targetSessionId, message, retry.notice);
+        scheduleOutboxRetry(retry.delayMs);
+    }
+
+    // Re-enable input
+    setInputState(true, 'Send');
+    updateSendButtonState();
+    if (!sendBtn.disabled) {
+        messageInput.focus();
+    }
+}
+
+async function queueMessage(targetSessionId, message, notice = '⏸ Offline - message queued and will be sent when you reconnect') {
+    try {
+        await queueOutboxMessage(targetSessionId, message);
+        const statusMsg = addStatusMessage(notice, 'info');
+        setTimeout(() => removeStatusMessage(statusMsg), 5000);
+    } catch (error) {
+        console.error('Failed to queue message:', error);
+        addMessage('error', 'You are offline and the message could not be queued.', targetSessionId);
+    }
+}
+
+function scheduleOutboxRetry(delayMs = null) {
+    // Server-provided delay (Retry-After), otherwise exponential backoff
+    if (delayMs === null) {
+        delayMs = outboxRetryDelay;
+        outboxRetryDelay = Math.min(outboxRetryDelay * 2, OUTBOX_RETRY_MAX_MS);
+    }
+
+    clearTimeout(outboxRetryTimer);
+    outboxRetryTimer = setTimeout(() => {
+        outboxRetryTimer = null;
+        flushOutbox();
+    }, delayMs);
+}
+
+async function flushOutbox() {
+    if (!navigator.onLine) return;
+
+    if (flushingOutbox) {
+        // Let the running flush pick up messages queued meanwhile
+        outboxFlushRequested = true;
+        return;
+    }
+    flushingOutbox = true;
+
+    try {
+        do {
+            outboxFlushRequested = false;
+
+            // Send oldest first - later messages may depend on earlier replies.
+            // The outbox is re-read for every message, so new ones are picked up.
+            let item;
+            while ((item = (await listOutboxMessages())[0])) {
+                // Leave the outbox once the server has accepted the task, so a reload does not resend it
+                const retry = await runTask(item.sessionId, item.message, () => removeOutboxMessage(item.id));
+                if (retry) {
+                    // Server still unreachable - keep this message first in line and try again later
+                    scheduleOutboxRetry(retry.delayMs);
+                    return;
+                }
+                await removeOutboxMessage(item.id);
+            }
+        } while (outboxFlushRequested);
+
+        outboxRetryDelay = OUTBOX_RETRY_MIN_MS;
+    } catch (error) {
+        console.error('Failed to flush outbox:', error);
+    } finally {
+        flushingOutbox = false;
+    }
+}
+
+// Submit one message and poll until the task finishes.
+// Returns { delayMs, notice } if the server could not take the message and it should be
+// retried (delayMs null = use backoff), otherwise nothing. onAccepted runs once the task is submitted.
+async function runTask(targetSessionId, message, onAccepted = null) {
     // Show AI thinking status immediately
     const statusMsg = addStatusMessage('AI is thinking...');
-    setInputState(false, 'AI is thinking...');
 
     // Track elapsed time and update status message
     const startTime = Date.now();
@@ -182,10 +363,10 @@ async function sendMessage() {
         }
     }, 2000); // Update every 2 seconds
 
+    let submitData;
     try {
         // Step 1: Submit async task (RESTful: /api/sessions/{session_id}/chat)
-        const effectiveSessionId = sessionId || 'new';
-        const submitResponse = await fetch(`${AGENT_API_URL}/api/sessions/${effectiveSessionId}/chat`, {
+        const submitResponse = await fetch(`${AGENT_API_URL}/api/sessions/${targetSessionId}/chat`, {
             method: 'POST',
             headers: getAuthHeaders(),
             body: JSON.stringify({
@@ -201,18 +382,46 @@ async function sendMessage() {
             return;
         }
 
+        if (submitResponse.status === 503) {
+            // agent-api is restarting - resend once the new process is up
+            clearInterval(timeoutWarning);
+            removeStatusMessage(statusMsg);
+            const retryAfter = parseInt(submitResponse.headers.get('Retry-After') || '5', 10);
+            return { delayMs: retryAfter * 1000, notice: '⏸ Server restarting - message queued and will be resent shortly' };
+        }
+
         if (!submitResponse.ok) {
             const errorData = await submitResponse.json().catch(() => ({}));
             throw new Error(errorData.detail || `HTTP error! status: ${submitResponse.status}`);
         }
 
-        const submitData = await submitResponse.json();
-        const taskId = submitData.task_id;
+        submitData = await submitResponse.json();
+
+    } catch (error) {
+        clearInterval(timeoutWarning);
+        removeStatusMessage(statusMsg);
+
+        // Connection dropped before the task was accepted (e.g. the tunnel is down
+        // while the device stays online) - retry with backoff
+        if (error instanceof TypeError) {
+            return { delayMs: null, notice: '⏸ Connection lost - message queued and will be retried' };
+        }
 
-        // Step 2: Poll for completion every 5 seconds (RESTful: /api/sessions/{session_id}/tasks/{task_id})
+        console.error('Error sending message:', error);
+        addMessage('error', `Failed to send message: ${error.message}`, targetSessionId);
+        return;
+    }
+
+    const taskId = submitData.task_id;
+    if (onAccepted) {
+        await onAccepted();
+    }
+
+    // Step 2: Poll for completion every 5 seconds (RESTful: /api/sessions/{session_id}/tasks/{task_id})
+    await new Promise((resolve) => {
         const pollInterval = setInterval(async () => {
             try {
-                const statusResponse = await fetch(`${AGENT_API_URL}/api/sessions/${effectiveSessionId}/tasks/${taskId}`, {
+                const statusResponse = await fetch(`${AGENT_API_URL}/api/sessions/${targetSessionId}/tasks/${taskId}`, {
                     headers: getAuthHeaders()
                 });
 
@@ -232,96 +441,81 @@ async function sendMessage() {
 
                     if (result.is_error) {
                         // Handle error response
-                        addMessage('error', `Error: ${result.result || 'Unknown error occurred'}`);
+                        addMessage('error', `Error: ${result.result || 'Unknown error occurred'}`, targetSessionId);
                     } else {
-                        // Update session
-                        sessionId = result.session_id;
-                        localStorage.setItem('claude_session_id', sessionId);
-
-                        // Update stats
-                        turnCount = result.num_turns || 0;
-                        totalCost += result.total_cost_usd || 0;
-                        updateStats();
-                        updateSessionInfo();
-
                         // Add Claude's response
-                        addMessage('assistant', result.result);
+                        await addMessage('assistant', result.result, targetSessionId);
+
+                        // Update session if this conversation is still on screen
+                        if (targetSessionId === sessionId) {
+                            sessionId = result.session_id;
+                            localStorage.setItem('claude_session_id', sessionId);
+
+                            // Update stats
+                            turnCount = result.num_turns || 0;
+                            totalCost += result.total_cost_usd || 0;
+                            updateStats();
+                            updateSessionInfo();
+                        }
                     }
 
                     // Step 3: Cleanup task file after rendering (RESTful: DELETE /api/sessions/{session_id}/tasks/{task_id})
-                    fetch(`${AGENT_API_URL}/api/sessions/${effectiveSessionId}/tasks/${taskId}`, {
+                    fetch(`${AGENT_API_URL}/api/sessions/${targetSessionId}/tasks/${taskId}`, {
                         method: 'DELETE',
                         headers: getAuthHeaders()
                     }).catch(err => console.warn('Cleanup failed:', err));
 
-                    // Re-enable input
-                    setInputState(true, 'Send');
-                    updateSendButtonState();
-                    if (!sendBtn.disabled) {
-                        messageInput.focus();
-                    }
+                    resolve();
                 } else if (statusData.status === 'not_found') {
                     // Task not found
                     clearInterval(pollInterval);
                     clearInterval(timeoutWarning);
                     updateStatusMessage(statusMsg, '✗ Task not found', 'error');
-                    addMessage('error', 'Task not found. Please try again.');
+                    addMessage('error', 'Task not found. Please try again.', targetSessionId);
                     setTimeout(() => removeStatusMessage(statusMsg), 5000);
 
-                    setInputState(true, 'Send');
-                    updateSendButtonState();
+                    resolve();
                 }
                 // else: status is "processing" - continue polling
 
             } catch (pollError) {
                 console.error('Poll error:', pollError);
-                // Continue polling even on transient errors
+                // Continue polling even on transient errors (including offline periods)
             }
         }, 5000); // Poll every 5 seconds
+    });
+}
 
+async function addMessage(role, content, targetSessionId = sessionId) {
+    // Persist incrementally - one record per message
+    let id = null;
+    try {
+        id = await appendStoredMessage(targetSessionId || '', role, content);
     } catch (error) {
-        clearInterval(timeoutWarning);
-        console.error('Error sending message:', error);
+        console.warn('Failed to store message:', error);
+    }
 
-        updateStatusMessage(statusMsg, '✗ Failed to send message', 'error');
-        addMessage('error', `Failed to send message: ${error.message}`);
+    // Another conversation is on screen - it is stored for later
+    if (targetSessionId !== sessionId) return;
 
-        setTimeout(() => removeStatusMessage(statusMsg), 5000);
-        setInputState(true, 'Send');
-        updateSendButtonState();
-        if (!sendBtn.disabled) {
-            messageInput.focus();
-        }
+    // Window is scrolled back into history - jump to the latest messages
+    if (hasNewer && id !== null) {
+        await renderLatestWindow();
+        return;
     }
-}
 
-function addMessage(role, content) {
     // Remove welcome message if present
     const welcome = chatContainer.querySelector('.welcome-message');
     if (welcome) {
         welcome.remove();
     }
 
-    const messageDiv = document.createElement('div');
-    messageDiv.className = `message message-${role}`;
-
-    const roleLabel = document.createElement('div');
-    roleLabel.className = 'message-role';
-    roleLabel.textContent = role === 'user' ? 'You' : role === 'assistant' ? 'Claude' : 'Error';
-
-    const contentDiv = document.createElement('div');
-    contentDiv.className = 'message-content';
-    contentDiv.textContent = content;
-
-    messageDiv.appendChild(roleLabel);
-    messageDiv.appendChild(contentDiv);
-    chatContainer.appendChild(messageDiv);
+    // Keep status messages below the conversation
+    chatContainer.insertBefore(createMessageElement({ id, role, content }), chatContainer.querySelector('.status-message'));
+    trimWindow('top');
 
     // Scroll to bottom
     chatContainer.scrollTop = chatContainer.scrollHeight;
-
-    // Save to localStorage
-    saveChatHistory();
 }
 
 function updateStats() {
@@ -378,57 +572,131 @@ function removeStatusMessage(statusDiv) {
     }
 }
 
-function saveChatHistory() {
-    const messages = Array.from(chatContainer.querySelectorAll('.message')).map(msg => ({
-        role: msg.classList.contains('message-user') ? 'user' :
-              msg.classList.contains('message-assistant') ? 'assistant' : 'error',
-        content: msg.querySelector('.message-content').textContent
-    }));
-    localStorage.setItem('chat_history', JSON.stringify(messages));
+function createMessageElement(record) {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message message-${record.role}`;
+    if (record.id !== null && record.id !== undefined) {
+        messageDiv.dataset.id = record.id;
+    }
+
+    const roleLabel = document.createElement('div');
+    roleLabel.className = 'message-role';
+    roleLabel.textContent = record.role === 'user' ? 'You' : record.role === 'assistant' ? 'Claude' : 'Error';
+
+    const contentDiv = document.createElement('div');
+    contentDiv.className = 'message-content';
+    contentDiv.textContent = record.content;
+
+    messageDiv.appendChild(roleLabel);
+    messageDiv.appendChild(contentDiv);
+    return messageDiv;
 }
 
-function loadChatHistory() {
-    const history = localStorage.getItem('chat_history');
-    if (!history) return;
+async function renderLatestWindow() {
+    const displayedSessionId = sessionId;
+    let messages;
+    try {
+        messages = await loadStoredMessages(displayedSessionId, { limit: PAGE_SIZE });
+    } catch (error) {
+        console.warn('Failed to load chat history:', error);
+        return;
+    }
+
+    // Session changed while loading
+    if (displayedSessionId !== sessionId) return;
+
+    chatContainer.querySelectorAll('.message').forEach(el => el.remove());
+    if (messages.length > 0) {
+        const welcome = chatContainer.querySelector('.welcome-message');
+        if (welcome) welcome.remove();
+    }
+
+    const fragment = document.createDocumentFragment();
+    messages.forEach(record => fragment.appendChild(createMessageElement(record)));
+    chatContainer.insertBefore(fragment, chatContainer.querySelector('.status-message'));
+
+    hasOlder = messages.length === PAGE_SIZE;
+    hasNewer = false;
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+}
+
+async function loadOlderMessages() {
+    const first = chatContainer.querySelector('.message[data-id]');
+    if (loadingWindow || !hasOlder || !first) return;
+    loadingWindow = true;
 
     try {
-        const messages = JSON.parse(history);
-        if (messages.length > 0) {
-            // Remove welcome message
-            const welcome = chatContainer.querySelector('.welcome-message');
-            if (welcome) welcome.remove();
-
-            // Add all messages
-            messages.forEach(msg => {
-                addMessageWithoutSave(msg.role, msg.content);
-            });
-        }
+        const messages = await loadStoredMessages(sessionId, { beforeId: Number(first.dataset.id), limit: PAGE_SIZE });
+        hasOlder = messages.length === PAGE_SIZE;
+
+        // Prepend without moving what the user is looking at
+        const previousHeight = chatContainer.scrollHeight;
+        const fragment = document.createDocumentFragment();
+        messages.forEach(record => fragment.appendChild(createMessageElement(record)));
+        chatContainer.insertBefore(fragment, first);
+        chatContainer.scrollTop += chatContainer.scrollHeight - previousHeight;
+
+        trimWindow('bottom');
     } catch (error) {
-        console.error('Failed to load chat history:', error);
+        console.warn('Failed to load older messages:', error);
+    } finally {
+        loadingWindow = false;
     }
 }
 
-function addMessageWithoutSave(role, content) {
-    const welcome = chatContainer.querySelector('.welcome-message');
-    if (welcome) welcome.remove();
+async function loadNewerMessages() {
+    const rendered = chatContainer.querySelectorAll('.message[data-id]');
+    const last = rendered[rendered.length - 1];
+    if (loadingWindow || !hasNewer || !last) return;
+    loadingWindow = true;
 
-    const messageDiv = document.createElement('div');
-    messageDiv.className = `message message-${role}`;
+    try {
+        const messages = await loadStoredMessages(sessionId, { afterId: Number(last.dataset.id), limit: PAGE_SIZE });
+        hasNewer = messages.length === PAGE_SIZE;
 
-    const roleLabel = document.createElement('div');
-    roleLabel.className = 'message-role';
-    roleLabel.textContent = role === 'user' ? 'You' : role === 'assistant' ? 'Claude' : 'Error';
+        const fragment = document.createDocumentFragment();
+        messages.forEach(record => fragment.appendChild(createMessageElement(record)));
+        chatContainer.insertBefore(fragment, chatContainer.querySelector('.status-message'));
 
-    const contentDiv = document.createElement('div');
-    contentDiv.className = 'message-content';
-    contentDiv.textContent = content;
+        trimWindow('top');
+    } catch (error) {
+        console.warn('Failed to load newer messages:', error);
+    } finally {
+        loadingWindow = false;
+    }
+}
 
-    messageDiv.appendChild(roleLabel);
-    messageDiv.appendChild(contentDiv);
-    chatContainer.appendChild(messageDiv);
+// Drop messages beyond MAX_RENDERED from one end of the window
+function trimWindow(side) {
+    const rendered = chatContainer.querySelectorAll('.message');
+    const excess = rendered.length - MAX_RENDERED;
+    if (excess <= 0) return;
+
+    if (side === 'top') {
+        const previousHeight = chatContainer.scrollHeight;
+        for (let i = 0; i < excess; i++) {
+            rendered[i].remove();
+        }
+        chatContainer.scrollTop -= previousHeight - chatContainer.scrollHeight;
+        hasOlder = true;
+    } else {
+        for (let i = 0; i < excess; i++) {
+            rendered[rendered.length - 1 - i].remove();
+        }
+        hasNewer = true;
+    }
+}
+
+function onChatScroll() {
+    if (chatContainer.scrollTop < 200) {
+        loadOlderMessages();
+    } else if (chatContainer.scrollHeight - chatContainer.scrollTop - chatContainer.clientHeight < 200) {
+        loadNewerMessages();
+    }
 }
 
 async function loadSessions() {
+    let data;
     try {
         const response = await fetch(`${AGENT_API_URL}/api/sessions`, {
             headers: getAuthHeaders()
@@ -436,46 +704,67 @@ async function loadSessions() {
 
         if (!response.ok) {
             console.error('Failed to load sessions');
+            // Server unreachable behind the proxy - fall back to the last known list
+            if (response.status >= 500) {
+                renderSessionOptions(loadCachedSessions());
+            }
             return;
         }
 
-        const data = await response.json();
-        const sessions = data.sessions || [];
+        data = await response.json();
 
-        // Remember current selection to restore after rebuild
-        const currentSelection = sessionSelect.value;
+        // Keep the list so the dropdown still works after an offline reload
+        localStorage.setItem('sessions_cache', JSON.stringify(data));
+    } catch (error) {
+        console.error('Error loading sessions:', error);
+        data = loadCachedSessions();
+    }
 
-        // Rebuild dropdown - start empty
-        sessionSelect.innerHTML = '<option value="">Select a session...</option>';
+    renderSessionOptions(data);
+}
 
-        if (sessions.length === 0 && data.hint) {
-            // Show hint as disabled option when no sessions found
-            const hintOption = document.createElement('option');
-            hintOption.disabled = true;
-            hintOption.textContent = `💡 ${data.hint}`;
-            sessionSelect.appendChild(hintOption);
-        }
+function loadCachedSessions() {
+    try {
+        return JSON.parse(localStorage.getItem('sessions_cache')) || { sessions: [] };
+    } catch (error) {
+        return { sessions: [] };
+    }
+}
 
-        sessions.forEach(session => {
-            const option = document.createElement('option');
-            option.value = session.session_id;
+function renderSessionOptions(data) {
+    const sessions = data.sessions || [];
 
-            // Show FULL session ID + preview of first message
-            const display = session.display || 'No description';
-            const preview = display.length > 40 ? display.substring(0, 40) + '...' : display;
+    // Remember current selection to restore after rebuild
+    const currentSelection = sessionSelect.value;
 
-            option.textContent = `${session.session_id} - ${preview}`;
-            option.title = `${display}\nProject: ${session.project || 'N/A'}`;
+    // Rebuild dropdown - start empty
+    sessionSelect.innerHTML = '<option value="">Select a session...</option>';
 
-            sessionSelect.appendChild(option);
-        });
+    if (sessions.length === 0 && data.hint) {
+        // Show hint as disabled option when no sessions found
+        const hintOption = document.createElement('option');
+        hintOption.disabled = true;
+        hintOption.textContent = `💡 ${data.hint}`;
+        sessionSelect.appendChild(hintOption);
+    }
 
-        // Restore selection if it still exists in the list
-        if (currentSelection) {
-            sessionSelect.value = currentSelection;
-        }
-    } catch (error) {
-        console.error('Error loading sessions:', error);
+    sessions.forEach(session => {
+        const option = document.createElement('option');
+        option.value = session.session_id;
+
+        // Show FULL session ID + preview of first message
+        const display = session.display || 'No description';
+        const preview = display.length > 40 ? display.substring(0, 40) + '...' : display;
+
+        option.textContent = `${session.session_id} - ${preview}`;
+        option.title = `${display}\nProject: ${session.project || 'N/A'}`;
+
+        sessionSelect.appendChild(option);
+    });
+
+    // Restore selection if it still exists in the list
+    if (currentSelection) {
+        sessionSelect.value = currentSelection;
     }
 }
 
@@ -522,4 +811,7 @@ function switchSession() {
     updateSessionInfo();
     updateSendButtonState();
     messageInput.focus();
+
+    // Show the most recent messages stored for this session
+    renderLatestWindow();
 }
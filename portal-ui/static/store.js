@@ -0,0 +1,94 @@
+// IndexedDB storage for chat history and the offline outbox
+//
+// messages: one record per chat message, appended incrementally and read
+//           back in pages per session (never the whole history at once)
+// outbox:   messages submitted while offline, flushed on reconnect
+
+const DB_NAME = 'agent-portal';
+const DB_VERSION = 1;
+
+let dbPromise = null;
+
+function openStore() {
+    if (!dbPromise) {
+        dbPromise = new Promise((resolve, reject) => {
+            const request = indexedDB.open(DB_NAME, DB_VERSION);
+
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                const messages = db.createObjectStore('messages', { keyPath: 'id', autoIncrement: true });
+                messages.createIndex('session', ['sessionId', 'id']);
+                db.createObjectStore('outbox', { keyPath: 'id', autoIncrement: true });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+    return dbPromise;
+}
+
+function requestToPromise(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function storeTransaction(storeName, mode, fn) {
+    const db = await openStore();
+    const tx = db.transaction(storeName, mode);
+    const result = await fn(tx.objectStore(storeName));
+    await new Promise((resolve, reject) => {
+        tx.oncomplete = resolve;
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error);
+    });
+    return result;
+}
+
+// Append one message and return its id
+function appendStoredMessage(sessionId, role, content) {
+    return storeTransaction('messages', 'readwrite', (store) =>
+        requestToPromise(store.add({ sessionId, role, content, createdAt: Date.now() }))
+    );
+}
+
+// Load up to `limit` messages of a session, oldest first.
+// beforeId: only messages older than this id (scrolling up)
+// afterId:  only messages newer than this id (scrolling down)
+// Without either, the newest page is returned.
+function loadStoredMessages(sessionId, { beforeId = null, afterId = null, limit = 50 } = {}) {
+    return storeTransaction('messages', 'readonly', (store) => new Promise((resolve, reject) => {
+        const lower = [sessionId, afterId !== null ? afterId : -Infinity];
+        const upper = [sessionId, beforeId !== null ? beforeId : Infinity];
+        const range = IDBKeyRange.bound(lower, upper, afterId !== null, beforeId !== null);
+        const direction = afterId !== null ? 'next' : 'prev';
+
+        const messages = [];
+        const request = store.index('session').openCursor(range, direction);
+        request.onsuccess = () => {
+            const cursor = request.result;
+            if (cursor && messages.length < limit) {
+                messages.push(cursor.value);
+                cursor.continue();
+            } else {
+                resolve(direction === 'prev' ? messages.reverse() : messages);
+            }
+        };
+        request.onerror = () => reject(request.error);
+    }));
+}
+
+function queueOutboxMessage(sessionId, message) {
+    return storeTransaction('outbox', 'readwrite', (store) =>
+        requestToPromise(store.add({ sessionId, message, createdAt: Date.now() }))
+    );
+}
+
+function listOutboxMessages() {
+    return storeTransaction('outbox', 'readonly', (store) => requestToPromise(store.getAll()));
+}
+
+function removeOutboxMessage(id) {
+    return storeTransaction('outbox', 'readwrite', (store) => requestToPromise(store.delete(id)));
+}
@@ -0,0 +1,88 @@
+// Service worker - caches the app shell for offline use and shows task
+// completion notifications pushed by agent-api
+
+// Bump the version to drop old caches after a release
+const CACHE_NAME = 'agent-portal-v1';
+const APP_SHELL = ['/', '/app.js', '/store.js', '/styles.css'];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME).then((cache) => cache.addAll(APP_SHELL))
+    );
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((names) => Promise.all(
+                names.filter((name) => name !== CACHE_NAME).map((name) => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+// Stale-while-revalidate for the app shell: answer from cache instantly,
+// refresh the cached copy in the background. API calls are never intercepted.
+self.addEventListener('fetch', (event) => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin || !APP_SHELL.includes(url.pathname)) {
+        return;
+    }
+
+    event.respondWith(
+        caches.open(CACHE_NAME).then(async (cache) => {
+            const cached = await cache.match(event.request);
+            const network = fetch(event.request)
+                .then((response) => {
+                    if (response.ok) {
+                        cache.put(event.request, response.clone());
+                    }
+                    return response;
+                })
+                .catch(() => cached);
+
+            if (cached) {
+                event.waitUntil(network);
+                return cached;
+            }
+            return network;
+        })
+    );
+});
+
+self.addEventListener('push', (event) => {
+    let data = {};
+    try {
+        data = event.data ? event.data.json() : {};
+    } catch (e) {
+        data = { preview: event.data ? event.data.text() : '' };
+    }
+
+    const title = data.is_error ? '✗ Agent task failed' : '✓ Agent task finished';
+    const body = data.preview || 'Open the portal to see the result.';
+
+    event.waitUntil(
+        self.registration.showNotification(title, {
+            body: body,
+            tag: data.task_id || 'agent-task',
+            data: { sessionId: data.session_id }
+        })
+    );
+});
+
+self.addEventListener('notificationclick', (event) => {
+    event.notification.close();
+
+    // Focus an open portal tab, or open a new one
+    event.waitUntil(
+        self.clients.matchAll({ type: 'window', includeUncontrolled: true }).then((clients) => {
+            for (const client of clients) {
+                if ('focus' in client) {
+                    return client.focus();
+                }
+            }
+            return self.clients.openWindow('/');
+        })
+    );
+});
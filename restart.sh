@@ -0,0 +1,43 @@
+#!/bin/bash
+
+# Zero-downtime restart of the Agent API
+# The running process hands its listening socket to a freshly started one,
+# which takes new requests immediately. The old process drains: running
+# tasks finish (up to DRAIN_DEADLINE_SECONDS) or are handed to the new one.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+cd "$SCRIPT_DIR"
+
+# Colors for output
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+RED='\033[0;31m'
+NC='\033[0m' # No Color
+
+echo -e "${YELLOW}Restarting Agent API${NC}"
+echo "===================="
+
+if [ ! -f logs/agent-api.pid ] || ! ps -p $(cat logs/agent-api.pid) > /dev/null 2>&1; then
+    echo -e "${RED}Agent API is not running - use ./start.sh${NC}"
+    exit 1
+fi
+
+OLD_PID=$(cat logs/agent-api.pid)
+echo "Handing over from PID $OLD_PID..."
+kill -HUP $OLD_PID
+
+# The new process writes its own PID file once it is up
+for i in $(seq 1 30); do
+    NEW_PID=$(cat logs/agent-api.pid 2>/dev/null)
+    if [ -n "$NEW_PID" ] && [ "$NEW_PID" != "$OLD_PID" ] && curl -sf http://127.0.0.1:8001/health > /dev/null; then
+        echo -e "${GREEN}✓ Agent API restarted (PID: $NEW_PID)${NC}"
+        echo "Old process $OLD_PID is draining - see logs/agent-api.log"
+        echo ""
+        exit 0
+    fi
+    sleep 1
+done
+
+echo -e "${RED}New Agent API process did not become ready${NC}"
+echo "Check logs/agent-api.log for details"
+exit 1
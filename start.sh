@@ -14,6 +14,9 @@ cd "$SCRIPT_DIR"
 # Export project path for the servers to use (where the script was called from)
 export CLAUDE_PROJECT_PATH="$PROJECT_DIR"
 
+# Agent API rewrites its PID file itself when restart.sh hands over to a new process
+export AGENT_API_PID_FILE="$SCRIPT_DIR/logs/agent-api.pid"
+
 # Colors for output
 GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
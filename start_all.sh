@@ -54,6 +54,12 @@ else
 fi
 
 # Start application services
+# Behind Nginx, completed task results are served via X-Accel-Redirect (see nginx.conf)
+# Only a default - a value from the environment or .env (even empty, to turn it off) wins
+if [ -z "${ACCEL_REDIRECT_PREFIX+set}" ] && ! grep -qE '^ACCEL_REDIRECT_PREFIX=' .env 2>/dev/null; then
+    export ACCEL_REDIRECT_PREFIX="/_task_results/"
+fi
+
 echo ""
 echo "Starting application services..."
 ./start.sh
@@ -2,6 +2,10 @@
 
 # Stop script for Claude Code Remote Access
 # Stops both UI server and Agent API server
+#
+# Agent API drains first: it stops taking new tasks, lets running ones
+# finish (up to DRAIN_DEADLINE_SECONDS) and hands the rest to the next start.
+# Usage: ./stop.sh [--now]   (--now skips waiting for running tasks)
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$SCRIPT_DIR"
@@ -15,14 +19,38 @@ NC='\033[0m' # No Color
 echo -e "${YELLOW}Stopping Claude Code Remote Access (Application Services)${NC}"
 echo "=========================================================="
 
+# How long to wait for the Agent API drain before force killing
+if [ -f .env ]; then
+    DRAIN_DEADLINE_SECONDS=${DRAIN_DEADLINE_SECONDS:-$(grep -E '^DRAIN_DEADLINE_SECONDS=' .env | cut -d= -f2)}
+fi
+DRAIN_WAIT=$(( ${DRAIN_DEADLINE_SECONDS:-300} + 30 ))
+
 # Try to kill from PID files first
 KILLED=false
 
 if [ -f logs/agent-api.pid ]; then
     AGENT_PID=$(cat logs/agent-api.pid)
     if ps -p $AGENT_PID > /dev/null 2>&1; then
-        echo "Killing Agent API (PID: $AGENT_PID)..."
-        kill $AGENT_PID 2>/dev/null && KILLED=true
+        # First SIGTERM drains, a second one exits without waiting for tasks
+        echo "Draining Agent API (PID: $AGENT_PID)..."
+        kill -TERM $AGENT_PID 2>/dev/null && KILLED=true
+        if [ "$1" = "--now" ]; then
+            sleep 0.5
+            kill -TERM $AGENT_PID 2>/dev/null
+        fi
+
+        WAITED=0
+        while ps -p $AGENT_PID > /dev/null 2>&1 && [ $WAITED -lt $DRAIN_WAIT ]; do
+            if [ $((WAITED % 10)) -eq 0 ] && [ $WAITED -gt 0 ]; then
+                echo "  waiting for running tasks (${WAITED}s)..."
+            fi
+            sleep 1
+            WAITED=$((WAITED + 1))
+        done
+        if ps -p $AGENT_PID > /dev/null 2>&1; then
+            echo -e "${RED}Agent API did not drain in ${DRAIN_WAIT}s, force killing${NC}"
+            kill -9 $AGENT_PID 2>/dev/null
+        fi
         rm -f logs/agent-api.pid
     else
         echo "Agent API PID file exists but process not running"
@@ -2,6 +2,7 @@
 
 # Stop script for ALL services (Application + Infrastructure)
 # Stops application services, Nginx, and Cloudflare tunnel
+# Usage: ./stop_all.sh [--now]   (--now skips waiting for running agent tasks)
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$SCRIPT_DIR"
@@ -17,6 +18,9 @@ echo "====================="
 
 KILLED=false
 
+# Stop application services first - Nginx keeps routing result polls while agent-api drains
+./stop.sh "$@"
+
 # Stop Nginx
 if command -v nginx &> /dev/null; then
     # Check if Nginx is running
@@ -38,10 +42,6 @@ if command -v nginx &> /dev/null; then
     fi
 fi
 
-# Stop application services
-echo ""
-./stop.sh
-
 # Stop Cloudflare tunnel
 if [ -f logs/cloudflared.pid ]; then
     TUNNEL_PID=$(cat logs/cloudflared.pid)
@@ -7,7 +7,7 @@ from pathlib import Path
 # Add agent-api to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
 
-from auth import verify_auth
+from auth import verify_auth, verify_admin
 from config import config
 
 
@@ -62,3 +62,18 @@ class TestAuth:
             verify_auth(credentials)
 
         assert exc_info.value.status_code == 401
+
+    def test_verify_admin_success(self, monkeypatch):
+        """Test that listed admins pass the admin check"""
+        monkeypatch.setattr(config, 'ADMIN_USERNAMES', ['testuser'])
+
+        assert verify_admin('testuser') == 'testuser'
+
+    def test_verify_admin_forbidden(self, monkeypatch):
+        """Test that non-admin users are rejected with 403"""
+        monkeypatch.setattr(config, 'ADMIN_USERNAMES', ['admin'])
+
+        with pytest.raises(HTTPException) as exc_info:
+            verify_admin('testuser')
+
+        assert exc_info.value.status_code == 403
@@ -0,0 +1,173 @@
+import pytest
+import json
+from pathlib import Path
+import sys
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+from backends import AgentBackend, ClaudeCliBackend, BackendRouter, load_backends
+
+
+class TestClaudeCliBackend:
+    """Test the Claude CLI adapter"""
+
+    def test_build_args_stream(self):
+        """Test streaming arguments include --verbose"""
+        backend = ClaudeCliBackend(command='/opt/claude')
+
+        args = backend.build_args('Hello', stream=True)
+
+        assert args == ['/opt/claude', '-p', 'Hello', '--output-format', 'stream-json', '--verbose']
+
+    def test_parse_output(self):
+        """Test that CLI JSON is mapped to the canonical result"""
+        backend = ClaudeCliBackend()
+
+        result = backend.parse_output(json.dumps({
+            'result': 'Done', 'session_id': 's-1', 'total_cost_usd': 0.02, 'num_turns': 3
+        }))
+
+        assert result == {
+            'type': 'result', 'result': 'Done', 'session_id': 's-1',
+            'total_cost_usd': 0.02, 'num_turns': 3, 'is_error': False
+        }
+
+    def test_field_map(self):
+        """Test that a backend spec can rename result fields"""
+        backend = load_backends([{'name': 'x', 'field_map': {'total_cost_usd': 'cost_usd'}}])[0]
+
+        result = backend.parse_output(json.dumps({'result': 'Done', 'cost_usd': 0.5}))
+
+        assert result['total_cost_usd'] == 0.5
+        with pytest.raises(ValueError):
+            ClaudeCliBackend(field_map={'nope': 'x'})
+
+    def test_incomplete_backend_rejected(self):
+        """Test that a backend missing adapter methods cannot be created"""
+        class Partial(AgentBackend):
+            def build_args(self, message, session_id=None, stream=False):
+                return []
+
+        with pytest.raises(TypeError):
+            Partial('partial', 'agent')
+
+    def test_parse_output_invalid(self):
+        """Test that unparseable output raises ValueError"""
+        with pytest.raises(ValueError):
+            ClaudeCliBackend().parse_output('Not valid JSON')
+
+    def test_parse_stream_result(self):
+        """Test that only the final result event is recognized"""
+        backend = ClaudeCliBackend()
+
+        assert backend.parse_stream_result(b'{"type": "assistant"}') is None
+        assert backend.parse_stream_result(b'garbage') is None
+        assert backend.parse_stream_result(b'{"type": "result", "result": "ok"}')['result'] == 'ok'
+
+    def test_is_progress_event(self):
+        """Test that assistant events count as progress"""
+        backend = ClaudeCliBackend()
+
+        assert backend.is_progress_event(b'{"type": "assistant", "message": {}}') is True
+        assert backend.is_progress_event(b'{"type": "system", "subtype": "init"}') is False
+        assert backend.is_progress_event(b'garbage') is False
+
+
+class TestLoadBackends:
+    """Test backend configuration"""
+
+    def test_default_backend(self):
+        """Test that no config yields one backend using AGENT_CLI_COMMAND"""
+        backends = load_backends([], default_command='my-agent', max_turns=4)
+
+        assert len(backends) == 1
+        assert backends[0].command == 'my-agent'
+        assert backends[0].max_turns == 4
+
+    def test_configured_backends(self):
+        """Test that backends are built in configured order"""
+        backends = load_backends([
+            {'name': 'primary', 'command': 'claude'},
+            {'name': 'secondary', 'type': 'claude-cli', 'command': '/opt/claude'}
+        ])
+
+        assert [b.name for b in backends] == ['primary', 'secondary']
+
+    def test_unknown_type(self):
+        """Test that unknown backend types are rejected"""
+        with pytest.raises(ValueError):
+            load_backends([{'name': 'x', 'type': 'nope'}])
+
+    def test_duplicate_names(self):
+        """Test that backend names must be unique"""
+        with pytest.raises(ValueError):
+            load_backends([{'name': 'x'}, {'name': 'x'}])
+
+
+class TestBackendRouter:
+    """Test routing and fallback ordering"""
+
+    @pytest.fixture
+    def backends(self):
+        return load_backends([{'name': 'a'}, {'name': 'b'}, {'name': 'c'}])
+
+    def names(self, candidates):
+        return [b.name for b in candidates]
+
+    def test_least_loaded(self, backends):
+        """Test that busy backends are ordered after idle ones"""
+        router = BackendRouter(backends)
+        router.begin(backends[0])
+        router.begin(backends[0])
+        router.begin(backends[1])
+
+        assert self.names(router.candidates('/project')) == ['c', 'b', 'a']
+
+    def test_fastest(self, backends):
+        """Test that the fastest backend by moving average comes first"""
+        router = BackendRouter(backends, strategy='fastest')
+        for backend, elapsed in zip(backends, [3.0, 1.0, 2.0]):
+            router.begin(backend)
+            router.end(backend, True, elapsed)
+
+        assert self.names(router.candidates('/project')) == ['b', 'c', 'a']
+
+    def test_failed_backend_tried_last(self, backends):
+        """Test that a backend in cooldown becomes the last fallback"""
+        router = BackendRouter(backends, cooldown=60)
+        router.begin(backends[0])
+        router.end(backends[0], False, 1.0)
+
+        assert self.names(router.candidates('/project')) == ['b', 'c', 'a']
+        assert router.stats()[0]['cooling_down'] is True
+
+    def test_project_route(self, backends):
+        """Test that a project rule restricts and orders backends"""
+        router = BackendRouter(backends, routes={
+            '/project': {'backends': ['c', 'b'], 'strategy': 'fastest'},
+            'default': {'backends': ['a']}
+        })
+
+        assert self.names(router.candidates('/project')) == ['c', 'b']
+        assert self.names(router.candidates('/other')) == ['a']
+
+    def test_preferred_backend(self, backends):
+        """Test that a requested backend is tried first"""
+        router = BackendRouter(backends)
+
+        assert self.names(router.candidates('/project', preferred='c')) == ['c', 'a', 'b']
+        with pytest.raises(KeyError):
+            router.candidates('/project', preferred='zzz')
+
+    def test_track(self, backends):
+        """Test that track() reports load while running"""
+        router = BackendRouter(backends)
+
+        with router.track(backends[1]) as run:
+            assert router.stats()[1]['in_flight'] == 1
+            run['success'] = True
+
+        stats = router.stats()[1]
+        assert stats['in_flight'] == 0
+        assert stats['avg_seconds'] is not None
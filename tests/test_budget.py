@@ -0,0 +1,78 @@
+import pytest
+import json
+from datetime import date
+from pathlib import Path
+import sys
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+from budget import UsageStore, BudgetExceededError
+
+
+TODAY = date(2026, 10, 19)
+
+
+class TestUsageStore:
+    """Test usage counters and budget enforcement"""
+
+    def test_record_aggregates_all_scopes(self, tmp_path):
+        """Test that one record bumps global, user and session counters"""
+        store = UsageStore(str(tmp_path / "usage.json"))
+        store.record('alice', 'session-1', 0.05, 2, today=TODAY)
+        store.record('alice', 'session-1', 0.10, 3, today=TODAY)
+
+        assert store.totals('global', 'all', today=TODAY) == {'cost': 0.15, 'turns': 5, 'tasks': 2}
+        assert store.totals('user', 'alice', today=TODAY)['tasks'] == 2
+        assert store.totals('session', 'session-1', today=TODAY)['turns'] == 5
+
+    def test_counters_persist_across_instances(self, tmp_path):
+        """Test that counters are reloaded from disk"""
+        path = str(tmp_path / "usage.json")
+        UsageStore(path).record('alice', 'session-1', 0.05, 2, today=TODAY)
+
+        store = UsageStore(path)
+        assert store.totals('user', 'alice', today=TODAY)['cost'] == 0.05
+
+    def test_old_days_are_pruned(self, tmp_path):
+        """Test that days outside the retention window are dropped"""
+        path = tmp_path / "usage.json"
+        store = UsageStore(str(path), retention_days=2)
+        store.record('alice', 'session-1', 1.0, 1, today=date(2026, 10, 1))
+        store.record('alice', 'session-1', 0.5, 1, today=TODAY)
+
+        stored = json.loads(path.read_text())
+        assert list(stored['user']['alice']) == ['2026-10-19']
+
+    def test_check_user_daily_limit(self, tmp_path):
+        """Test that a user over their daily limit is rejected"""
+        store = UsageStore(str(tmp_path / "usage.json"), user_daily_limit=0.10)
+        store.record('alice', 'session-1', 0.10, 1, today=TODAY)
+
+        with pytest.raises(BudgetExceededError) as exc_info:
+            store.check('alice', today=TODAY)
+
+        assert 'alice' in str(exc_info.value)
+        store.check('bob', today=TODAY)  # Other users are unaffected
+
+    def test_check_session_limit(self, tmp_path):
+        """Test that a session over its limit cannot be resumed"""
+        store = UsageStore(str(tmp_path / "usage.json"), session_limit=1.0)
+        store.record('alice', 'session-1', 1.5, 4, today=TODAY)
+
+        with pytest.raises(BudgetExceededError):
+            store.check('alice', 'session-1', today=TODAY)
+
+        store.check('alice', None, today=TODAY)  # New sessions are allowed
+
+    def test_summary(self, tmp_path):
+        """Test usage report contents"""
+        store = UsageStore(str(tmp_path / "usage.json"), daily_limit=5.0)
+        store.record('alice', 'session-1', 0.25, 2, today=TODAY)
+
+        summary = store.summary('alice', session_id='session-1', days=7, today=TODAY)
+
+        assert summary['days'] == 7
+        assert summary['user']['cost'] == 0.25
+        assert summary['session']['tasks'] == 1
+        assert summary['limits']['daily_usd'] == 5.0
@@ -8,6 +8,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
 
 from claude_wrapper import ClaudeWrapper, ClaudeResponse
+from backends import ClaudeCliBackend
 
 
 class TestClaudeWrapper:
@@ -163,6 +164,39 @@ class TestClaudeWrapper:
         assert response.success is False
         assert 'error' in response.error.lower()
 
+    @patch('claude_wrapper.subprocess.run')
+    @patch('claude_wrapper.Path')
+    def test_execute_retryable_failures(self, mock_path, mock_run):
+        """Test that only failures before the agent acted are marked retryable"""
+        mock_path.home.return_value = Path('/home/user')
+
+        with patch.object(Path, 'exists', return_value=True):
+            wrapper = ClaudeWrapper(timeout=1)
+
+        # CLI not installed
+        mock_run.side_effect = FileNotFoundError('claude')
+        response = wrapper.execute('Test message')
+        assert response.success is False
+        assert response.retryable is True
+
+        # Exited before taking a turn
+        mock_run.side_effect = None
+        mock_run.return_value = Mock(returncode=1, stdout='', stderr='Not logged in')
+        assert wrapper.execute('Test message').retryable is True
+
+        # Exited after taking turns
+        mock_run.return_value = Mock(
+            returncode=1,
+            stdout=json.dumps({'is_error': True, 'result': 'Max turns', 'num_turns': 3, 'total_cost_usd': 0.2}),
+            stderr=''
+        )
+        assert wrapper.execute('Test message').retryable is False
+
+        # Timed out while working
+        from subprocess import TimeoutExpired
+        mock_run.side_effect = TimeoutExpired('claude', 1)
+        assert wrapper.execute('Test message').retryable is False
+
     @patch('claude_wrapper.Path')
     def test_list_sessions_no_history_file(self, mock_path):
         """Test listing sessions when history file doesn't exist"""
@@ -174,3 +208,34 @@ class TestClaudeWrapper:
 
         assert result['sessions'] == []
         assert 'hint' in result  # Should include helpful hint when no sessions found
+
+    def test_list_sessions_from_history(self, tmp_path, monkeypatch):
+        """Test that history is streamed and filtered to the project"""
+        monkeypatch.setenv('HOME', str(tmp_path))
+        (tmp_path / '.claude.json').write_text('{}')
+        (tmp_path / '.claude').mkdir()
+        (tmp_path / '.claude' / 'history.jsonl').write_text(
+            json.dumps({'sessionId': 's-1', 'project': '/project', 'display': 'old', 'timestamp': 1}) + '\n'
+            + 'not json\n'
+            + json.dumps({'sessionId': 's-2', 'project': '/other', 'timestamp': 2}) + '\n'
+            + json.dumps({'sessionId': 's-1', 'project': '/project', 'display': 'new', 'timestamp': 3}) + '\n'
+        )
+
+        result = ClaudeWrapper(project_path='/project').list_sessions()
+
+        assert [s['session_id'] for s in result['sessions']] == ['s-1']
+        assert result['sessions'][0]['display'] == 'new'
+
+    @patch('claude_wrapper.Path')
+    def test_build_args_with_max_turns(self, mock_path):
+        """Test that a turn cap is passed to the CLI"""
+        mock_path.home.return_value = Path('/home/user')
+
+        with patch.object(Path, 'exists', return_value=True):
+            wrapper = ClaudeWrapper(backend=ClaudeCliBackend(max_turns=5))
+
+        args = wrapper.build_args('Test message', session_id='existing-session')
+
+        assert args[:2] == ['claude', '-p']
+        assert args[args.index('--resume') + 1] == 'existing-session'
+        assert args[args.index('--max-turns') + 1] == '5'
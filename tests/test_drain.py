@@ -0,0 +1,188 @@
+import pytest
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+from drain import TaskRegistry, DrainController, AdoptedProcess, pid_alive, process_start_time
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TaskRegistry(str(tmp_path / "tasks.json"))
+
+
+@pytest.fixture
+def sleeper():
+    """Live process that is not this one"""
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+@pytest.fixture
+def other_process(registry, sleeper):
+    """Registry handle acting as a different, running agent-api process"""
+    other = TaskRegistry(str(registry.path))
+    other.owner = sleeper.pid
+    other.owner_start_time = process_start_time(sleeper.pid)
+    return other
+
+
+def dead_pid():
+    """PID of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestTaskRegistry:
+    """Test task ownership shared between processes"""
+
+    def test_add_and_finish(self, registry, other_process):
+        """Test that only the owner finishes a task"""
+        registry.add('abc', pid=1, started=time.time())
+        other = other_process
+
+        assert registry.owns('abc')
+        assert registry.owned() == ['abc']
+        assert other.finish('abc') is False
+        assert registry.finish('abc') is True
+        assert registry.owned() == []
+
+    def test_release_and_adopt(self, registry, other_process):
+        """Test that released tasks are claimed once by another process"""
+        registry.add('abc', pid=1, message='Hello')
+        other = other_process
+
+        assert other.claim_orphans() == []
+        assert registry.release() == ['abc']
+
+        claimed = other.claim_orphans()
+        assert [task_id for task_id, _ in claimed] == ['abc']
+        assert claimed[0][1]['message'] == 'Hello'
+        assert other.owns('abc')
+        assert not registry.owns('abc')
+        assert registry.claim_orphans() == []
+
+    def test_adopt_from_dead_owner(self, registry, other_process):
+        """Test that tasks of a crashed process are adopted"""
+        crashed = other_process
+        crashed.owner = dead_pid()
+        crashed.add('abc', pid=1)
+
+        assert [task_id for task_id, _ in registry.claim_orphans()] == ['abc']
+
+    def test_adopt_from_reused_owner_pid(self, registry, other_process):
+        """Test that a live process reusing a crashed owner's PID does not keep its tasks"""
+        crashed = other_process
+        crashed.owner_start_time -= 1
+        crashed.add('abc', pid=1)
+
+        assert [task_id for task_id, _ in registry.claim_orphans()] == ['abc']
+
+    def test_update_requires_ownership(self, registry):
+        """Test that a released task is not modified by its old owner"""
+        registry.add('abc', pid=1)
+        registry.update('abc', pid=2)
+        registry.release()
+        registry.update('abc', pid=3)
+
+        assert registry._read()['abc']['pid'] == 2
+        assert registry._read()['abc']['pid_start_time'] == process_start_time(2)
+
+
+class TestAdoptedProcess:
+    """Test waiting on processes that are not our children"""
+
+    def test_wait_for_exit(self):
+        """Test that wait() returns once the process is gone"""
+        process = AdoptedProcess(dead_pid(), time.time())
+
+        assert process.wait(timeout=5) is None
+
+    def test_timeout_counts_from_launch(self):
+        """Test that the task timeout includes time before adoption"""
+        process = AdoptedProcess(os.getpid(), time.time() - 10)
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            process.wait(timeout=5)
+
+    def test_reused_pid(self, sleeper):
+        """Test that a process reusing the task's PID is neither waited on nor killed"""
+        process = AdoptedProcess(sleeper.pid, time.time(), process_start_time(sleeper.pid) - 1)
+
+        assert process.wait(timeout=5) is None
+        process.kill()
+        assert sleeper.poll() is None
+
+    def test_kill(self, sleeper):
+        """Test that the task process itself is killed"""
+        process = AdoptedProcess(sleeper.pid, time.time(), process_start_time(sleeper.pid))
+
+        process.kill()
+        assert sleeper.wait(timeout=5) is not None
+
+    def test_pid_alive(self):
+        """Test process liveness check"""
+        assert pid_alive(os.getpid())
+        assert not pid_alive(dead_pid())
+
+
+class TestDrainController:
+    """Test graceful drain"""
+
+    def test_drain_without_tasks(self, registry):
+        """Test that an idle process drains immediately"""
+        drained = []
+        controller = DrainController(registry, deadline=10, poll_interval=0.01)
+        controller.on_drained = lambda: drained.append(True)
+
+        assert controller.begin() is True
+        assert controller.begin() is False
+        assert controller.wait(timeout=5)
+        assert drained == [True]
+        assert controller.status()['draining'] is True
+
+    def test_waits_for_running_tasks(self, registry):
+        """Test that finishing tasks before the deadline ends the drain"""
+        registry.add('abc', pid=1)
+        controller = DrainController(registry, deadline=10, poll_interval=0.01)
+        controller.begin()
+
+        assert not controller.wait(timeout=0.05)
+        registry.finish('abc')
+        assert controller.wait(timeout=5)
+
+    def test_waits_until_idle(self, registry):
+        """Test that the drain waits for follow-up work such as notification deliveries"""
+        delivering = [True]
+        controller = DrainController(registry, deadline=10, poll_interval=0.01)
+        controller.is_idle = lambda: not delivering
+        controller.begin()
+
+        assert not controller.wait(timeout=0.05)
+        delivering.clear()
+        assert controller.wait(timeout=5)
+
+    def test_deadline_bounds_idle_wait(self, registry):
+        """Test that pending follow-up work does not hold the drain past the deadline"""
+        controller = DrainController(registry, deadline=0.05, poll_interval=0.01)
+        controller.is_idle = lambda: False
+        controller.begin()
+
+        assert controller.wait(timeout=5)
+
+    def test_deadline_hands_off_tasks(self, registry):
+        """Test that tasks still running at the deadline are released"""
+        registry.add('abc', pid=1)
+        controller = DrainController(registry, deadline=0.05, poll_interval=0.01)
+        controller.begin()
+
+        assert controller.wait(timeout=5)
+        assert registry._read()['abc']['owner'] is None
@@ -0,0 +1,153 @@
+import pytest
+import subprocess
+from pathlib import Path
+import sys
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+from git_changes import snapshot, compute_changes, record_start, record_end, load_changes, file_diff, objects_dir
+from config import config
+
+
+def git(repo, *args, check=True):
+    """Run git in a test repository (returns None if it fails and check is off)"""
+    result = subprocess.run(["git", *args], cwd=repo, check=check, capture_output=True, text=True)
+    return result.stdout if result.returncode == 0 else None
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    """Keep task files and snapshot objects in the test directory"""
+    monkeypatch.setattr(config, 'TASK_OUTPUT_DIR', str(tmp_path / "output"))
+    (tmp_path / "output").mkdir()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Repository with one commit containing a.txt and b.txt"""
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "user.name", "Test")
+    (path / "a.txt").write_text("one\ntwo\n")
+    (path / "b.txt").write_text("keep\n")
+    git(path, "add", ".")
+    git(path, "commit", "-q", "-m", "Initial")
+    return path
+
+
+class TestSnapshot:
+    """Test git state snapshots"""
+
+    def test_not_a_repository(self, tmp_path):
+        """Test that untracked projects are skipped"""
+        assert snapshot(str(tmp_path)) is None
+
+    def test_dirty_files(self, repo):
+        """Test that modified, untracked and deleted files are fingerprinted"""
+        (repo / "a.txt").write_text("changed\n")
+        (repo / "new.txt").write_text("new\n")
+        (repo / "b.txt").unlink()
+
+        state = snapshot(str(repo))
+
+        assert state["head"] == git(repo, "rev-parse", "HEAD").strip()
+        assert set(state["dirty"]) == {"a.txt", "new.txt", "b.txt"}
+        assert state["dirty"]["b.txt"] is None
+        # Dirty contents are stored so they can be diffed later - outside the project
+        assert git(repo, "cat-file", "-e", state["dirty"]["a.txt"], check=False) is None
+        blob = state["dirty"]["a.txt"]
+        assert (Path(objects_dir()) / blob[:2] / blob[2:]).exists()
+
+
+class TestComputeChanges:
+    """Test change summaries between snapshots"""
+
+    def test_no_changes(self, repo):
+        """Test that identical snapshots produce an empty summary"""
+        start = snapshot(str(repo))
+        end = snapshot(str(repo))
+
+        changes = compute_changes(str(repo), start, end)
+
+        assert changes["files"] == []
+        assert changes["commits"] == []
+
+    def test_working_tree_changes(self, repo):
+        """Test that only files changed during the task are reported"""
+        (repo / "b.txt").write_text("dirty before task\n")
+        start = snapshot(str(repo))
+
+        (repo / "a.txt").write_text("one\nthree\nfour\n")
+        (repo / "c.txt").write_text("added\n")
+
+        changes = compute_changes(str(repo), start, snapshot(str(repo)))
+
+        files = {f["path"]: f for f in changes["files"]}
+        assert set(files) == {"a.txt", "c.txt"}
+        assert files["a.txt"]["status"] == "modified"
+        assert (files["a.txt"]["insertions"], files["a.txt"]["deletions"]) == (2, 1)
+        assert files["c.txt"]["status"] == "added"
+        assert changes["insertions"] == 3
+
+    def test_commits(self, repo):
+        """Test that changes committed by the task are included"""
+        start = snapshot(str(repo))
+        (repo / "b.txt").unlink()
+        git(repo, "commit", "-q", "-am", "Remove b")
+
+        changes = compute_changes(str(repo), start, snapshot(str(repo)))
+
+        assert [c["subject"] for c in changes["commits"]] == ["Remove b"]
+        assert changes["files"][0]["path"] == "b.txt"
+        assert changes["files"][0]["status"] == "deleted"
+
+
+class TestTaskChanges:
+    """Test per-task change records"""
+
+    def test_record_and_diff(self, repo):
+        """Test that the summary is cached and diffs are generated per file"""
+        project_objects = git(repo, "count-objects")
+        assert record_start('abc', str(repo)) is True
+        assert "changes" not in load_changes('abc')
+
+        (repo / "a.txt").write_text("one\nTWO\n")
+        record = record_end('abc')
+        assert [f["path"] for f in record["changes"]["files"]] == ["a.txt"]
+        assert record["changes"]["overlapping"] is False
+
+        # Later edits do not change the cached summary
+        (repo / "b.txt").write_text("after the task\n")
+        assert record_end('abc')["changes"] == record["changes"]
+
+        diff = file_diff(record, "a.txt")
+        assert "--- a/a.txt" in diff
+        assert "+++ b/a.txt" in diff
+        assert "-two" in diff and "+TWO" in diff
+        assert file_diff(record, "b.txt") is None
+
+        # Nothing was written to the project's object store
+        assert git(repo, "count-objects") == project_objects
+
+    def test_overlapping_tasks(self, repo):
+        """Test that tasks running at the same time in one tree are flagged"""
+        record_start('first', str(repo))
+        record_start('second', str(repo))
+
+        (repo / "a.txt").write_text("one\nTWO\n")
+        assert record_end('first')["changes"]["overlapping"] is True
+        assert record_end('second')["changes"]["overlapping"] is True
+
+        # A task started after both ended ran alone
+        record_start('third', str(repo))
+        assert record_end('third')["changes"]["overlapping"] is False
+
+    def test_untracked_project(self, tmp_path):
+        """Test that non-git projects are not tracked"""
+
+        assert record_start('abc', str(tmp_path)) is False
+        assert load_changes('abc') is None
+        assert record_end('abc') is None
@@ -0,0 +1,170 @@
+import pytest
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+from notifications import NotificationTargets, NotificationDispatcher, validate_webhook_url
+
+
+@pytest.fixture
+def receiver():
+    """Local stand-in webhook receiver that fails the first N requests"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            server.requests.append((dict(self.headers), body))
+            status = 500 if len(server.requests) <= server.failures else server.status
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.failures = 0
+    server.status = 204
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def targets(tmp_path):
+    return NotificationTargets(str(tmp_path / "notifications.json"))
+
+
+class TestNotificationTargets:
+    """Test per-user notification target storage"""
+
+    def test_add_and_remove_webhook(self, targets):
+        """Test webhook registration is de-duplicated and removable"""
+        targets.add_webhook('alice', 'https://example.com/hook')
+        targets.add_webhook('alice', 'https://example.com/hook')
+
+        assert targets.get('alice')['webhooks'] == ['https://example.com/hook']
+        assert targets.remove_webhook('alice', 'https://example.com/hook') is True
+        assert targets.remove_webhook('alice', 'https://example.com/hook') is False
+
+    def test_push_subscription_replaced_by_endpoint(self, targets, tmp_path):
+        """Test that re-subscribing the same browser replaces its keys"""
+        targets.add_push('alice', {'endpoint': 'https://push/1', 'keys': {'auth': 'a'}})
+        targets.add_push('alice', {'endpoint': 'https://push/1', 'keys': {'auth': 'b'}})
+
+        reloaded = NotificationTargets(str(tmp_path / "notifications.json"))
+        assert reloaded.get('alice')['push'] == [{'endpoint': 'https://push/1', 'keys': {'auth': 'b'}}]
+
+    def test_validate_webhook_url(self):
+        """Test that only HTTP(S) URLs are accepted"""
+        assert validate_webhook_url('https://93.184.216.34/hook') == 'https://93.184.216.34/hook'
+        with pytest.raises(ValueError):
+            validate_webhook_url('file:///etc/passwd')
+
+    @pytest.mark.parametrize('url', [
+        'http://127.0.0.1:8001/api/admin/profile',
+        'http://localhost/hook',
+        'http://169.254.169.254/latest/meta-data/',
+        'http://10.0.0.5/hook',
+        'http://[::1]/hook',
+    ])
+    def test_validate_webhook_url_rejects_internal_hosts(self, url):
+        """Test that loopback, private and link-local targets are refused"""
+        with pytest.raises(ValueError):
+            validate_webhook_url(url)
+
+    def test_validate_webhook_url_allowlist(self):
+        """Test that NOTIFY_ALLOWED_HOSTS lets internal hosts through"""
+        assert validate_webhook_url('http://127.0.0.1/hook', allowed_hosts=['127.0.0.1'])
+
+    def test_validate_push_endpoint(self):
+        """Test that push endpoints must be HTTPS on a public host"""
+        assert validate_webhook_url('https://93.184.216.34/push', https_only=True)
+        with pytest.raises(ValueError):
+            validate_webhook_url('http://93.184.216.34/push', https_only=True)
+        with pytest.raises(ValueError):
+            validate_webhook_url('https://169.254.169.254/latest/meta-data/', https_only=True)
+
+
+class TestNotificationDispatcher:
+    """Test webhook delivery against a local receiver"""
+
+    def test_delivers_to_registered_and_task_webhooks(self, targets, receiver):
+        """Test that user and per-task webhooks both receive the event once"""
+        targets.add_webhook('alice', receiver.url)
+        dispatcher = NotificationDispatcher(targets, backoff=0.01, allowed_hosts=['127.0.0.1'])
+
+        delivered = dispatcher.notify('alice', {'event': 'task.completed'}, webhooks=[receiver.url, receiver.url + '2'])
+
+        assert delivered.result(timeout=5) == 2
+        assert [json.loads(body) for _, body in receiver.requests] == [{'event': 'task.completed'}] * 2
+
+    def test_retries_server_errors(self, targets, receiver):
+        """Test that 5xx responses are retried with backoff"""
+        receiver.failures = 2
+        dispatcher = NotificationDispatcher(targets, max_attempts=3, backoff=0.01, allowed_hosts=['127.0.0.1'])
+
+        delivered = dispatcher.notify('alice', {'event': 'task.completed'}, webhooks=[receiver.url])
+
+        assert delivered.result(timeout=5) == 1
+        assert len(receiver.requests) == 3
+
+    def test_gives_up_on_client_errors(self, targets, receiver):
+        """Test that 4xx responses are not retried"""
+        receiver.status = 404
+        dispatcher = NotificationDispatcher(targets, max_attempts=3, backoff=0.01, allowed_hosts=['127.0.0.1'])
+
+        delivered = dispatcher.notify('alice', {'event': 'task.completed'}, webhooks=[receiver.url])
+
+        assert delivered.result(timeout=5) == 0
+        assert len(receiver.requests) == 1
+
+    def test_signs_payload(self, targets, receiver):
+        """Test the HMAC signature header when a secret is configured"""
+        dispatcher = NotificationDispatcher(targets, webhook_secret='s3cret', allowed_hosts=['127.0.0.1'])
+
+        dispatcher.notify('alice', {'event': 'task.completed'}, webhooks=[receiver.url]).result(timeout=5)
+
+        headers, body = receiver.requests[0]
+        expected = hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+        assert headers['X-Agent-Signature'] == f"sha256={expected}"
+
+    def test_pending_deliveries(self, targets, receiver):
+        """Test that queued events count as pending until delivered"""
+        receiver.failures = 1
+        dispatcher = NotificationDispatcher(targets, max_attempts=2, backoff=0.2, allowed_hosts=['127.0.0.1'])
+
+        delivered = dispatcher.notify('alice', {'event': 'task.completed'}, webhooks=[receiver.url])
+
+        assert dispatcher.pending() == 1
+        assert delivered.result(timeout=5) == 1
+        assert dispatcher.pending() == 0
+
+    def test_no_targets(self, targets):
+        """Test that events for users without targets are dropped"""
+        dispatcher = NotificationDispatcher(targets)
+
+        assert dispatcher.notify('bob', {'event': 'task.completed'}).result(timeout=5) == 0
+        assert dispatcher.push_enabled is False
+
+    def test_internal_webhook_refused_at_delivery(self, targets, receiver):
+        """Test that webhooks to internal hosts are not called without an allowlist"""
+        dispatcher = NotificationDispatcher(targets, max_attempts=1)
+
+        assert dispatcher.notify('alice', {'event': 'task.completed'}, webhooks=[receiver.url]).result(timeout=5) == 0
+        assert receiver.requests == []
+
+    def test_internal_push_endpoint_refused_at_delivery(self, targets):
+        """Test that push subscriptions pointing at internal hosts are not sent to"""
+        dispatcher = NotificationDispatcher(targets, max_attempts=1)
+        subscription = {'endpoint': 'https://169.254.169.254/push', 'keys': {}}
+
+        assert asyncio.run(dispatcher._deliver_push('alice', subscription, b'{}')) is False
@@ -0,0 +1,86 @@
+import pytest
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pathlib import Path
+import sys
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+import profiling
+from profiling import timed, add_timing, format_server_timing, ServerTimingMiddleware, sample_stacks
+
+
+class TestServerTiming:
+    """Test Server-Timing collection"""
+
+    def test_format_server_timing(self):
+        """Test that handler time excludes the named buckets"""
+        header = format_server_timing({'auth': 1.0, 'store': 2.5}, 10.0)
+
+        assert header == 'auth;dur=1.00, store;dur=2.50, handler;dur=6.50, total;dur=10.00'
+
+    def test_timed_outside_request_is_noop(self):
+        """Test that timed() works without a request context"""
+        with timed('store'):
+            pass
+
+        assert profiling._timings.get() is None
+
+    def test_middleware_adds_header(self):
+        """Test that buckets recorded in handlers appear in the header"""
+        app = FastAPI()
+        app.add_middleware(ServerTimingMiddleware)
+
+        @app.get('/')
+        async def handler():
+            with timed('store'):
+                time.sleep(0.01)
+            with timed('store'):
+                pass
+            add_timing('parse', 0.002)
+            return {}
+
+        response = TestClient(app).get('/')
+        entries = dict(e.split(';dur=') for e in response.headers['server-timing'].split(', '))
+
+        assert list(entries) == ['store', 'parse', 'handler', 'total']
+        assert float(entries['store']) >= 10
+        assert float(entries['parse']) == 2.0
+
+
+class TestSampler:
+    """Test the sampling profiler"""
+
+    def test_sample_stacks_collapsed_format(self):
+        """Test that a busy thread shows up as a collapsed stack"""
+        stop = threading.Event()
+
+        def busy_loop():
+            while not stop.is_set():
+                pass
+
+        worker = threading.Thread(target=busy_loop, name='busy-worker')
+        worker.start()
+        try:
+            output = sample_stacks(0.1, interval=0.001)
+        finally:
+            stop.set()
+            worker.join()
+
+        lines = output.splitlines()
+        busy = [line for line in lines if line.startswith('busy-worker;')]
+        assert busy
+        assert 'test_profiling.py:busy_loop' in busy[0]
+        assert int(busy[0].rsplit(' ', 1)[1]) > 0
+
+    def test_only_one_profile_at_a_time(self):
+        """Test that concurrent profiles are rejected"""
+        profiling._profile_lock.acquire()
+        try:
+            with pytest.raises(RuntimeError):
+                sample_stacks(0.01)
+        finally:
+            profiling._profile_lock.release()
@@ -0,0 +1,157 @@
+import pytest
+import json
+from pathlib import Path
+import sys
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+import task_output
+from task_output import (
+    task_log_path, task_stderr_path, task_result_path, read_chunk, iter_lines_reversed, read_result, append_event, append_error_result,
+    write_result_file
+)
+from config import config
+
+
+def write_events(path, events, trailing=b""):
+    """Write NDJSON events to a task log"""
+    with open(path, 'wb') as f:
+        for event in events:
+            f.write(json.dumps(event).encode() + b"\n")
+        f.write(trailing)
+
+
+class TestTaskOutput:
+    """Test append-only task log reading"""
+
+    def test_task_log_path(self, monkeypatch, tmp_path):
+        """Test that task logs live in the configured output directory"""
+        monkeypatch.setattr(config, 'TASK_OUTPUT_DIR', str(tmp_path))
+
+        assert task_log_path('abc') == str(tmp_path / 'claude_task_abc.jsonl')
+        # stderr is kept apart so the event log only ever holds NDJSON
+        assert task_stderr_path('abc') != task_log_path('abc')
+
+    def test_read_chunk_resumes_from_offset(self, tmp_path):
+        """Test that a second read returns only the events after the first"""
+        log = tmp_path / 'task.jsonl'
+        write_events(log, [{'type': 'system'}, {'type': 'assistant'}])
+
+        data, next_offset = read_chunk(str(log), 0, 1024)
+        assert data.count(b"\n") == 2
+        assert next_offset == log.stat().st_size
+
+        data, same_offset = read_chunk(str(log), next_offset, 1024)
+        assert data == b""
+        assert same_offset == next_offset
+
+    def test_read_chunk_stops_at_event_boundary(self, tmp_path):
+        """Test that partially written events are not returned"""
+        log = tmp_path / 'task.jsonl'
+        write_events(log, [{'type': 'system'}], trailing=b'{"type": "assi')
+
+        data, next_offset = read_chunk(str(log), 0, 1024)
+
+        assert json.loads(data) == {'type': 'system'}
+        assert next_offset == len(data)
+
+    def test_read_chunk_splits_oversized_event(self, tmp_path):
+        """Test that an event larger than the limit is returned in pieces"""
+        log = tmp_path / 'task.jsonl'
+        write_events(log, [{'type': 'assistant', 'text': 'x' * 100}])
+
+        data, next_offset = read_chunk(str(log), 0, 10)
+
+        assert len(data) == 10
+        assert next_offset == 10
+
+    def test_read_chunk_skips_blank_lines(self, tmp_path):
+        """Test that blank lines are not served as events"""
+        log = tmp_path / 'task.jsonl'
+        log.write_bytes(b'\n{"type": "system"}\n\n\n{"type": "assistant"}\n')
+
+        data, next_offset = read_chunk(str(log), 0, 1024)
+
+        assert data == b'{"type": "system"}\n{"type": "assistant"}\n'
+        assert next_offset == log.stat().st_size
+
+    def test_append_event(self, tmp_path):
+        """Test that events are appended without blank lines"""
+        log = tmp_path / 'task.jsonl'
+        append_event(str(log), {'type': 'system'})
+        append_event(str(log), {'type': 'assistant'})
+
+        assert log.read_bytes() == b'{"type": "system"}\n{"type": "assistant"}\n'
+
+    def test_append_event_after_partial_line(self, tmp_path):
+        """Test that an event after a dead writer's partial line starts on a new line"""
+        log = tmp_path / 'task.jsonl'
+        log.write_bytes(b'{"type": "assi')
+
+        append_event(str(log), {'type': 'system'})
+
+        assert log.read_bytes() == b'{"type": "assi\n{"type": "system"}\n'
+
+    def test_iter_lines_reversed(self, tmp_path, monkeypatch):
+        """Test that lines are yielded last to first across block boundaries"""
+        monkeypatch.setattr(task_output, 'TAIL_BLOCK_SIZE', 7)
+        log = tmp_path / 'task.jsonl'
+        log.write_bytes(b'first line\n\nsecond\r\nthird and longest line\n')
+
+        assert list(iter_lines_reversed(str(log))) == [b'third and longest line', b'second', b'first line']
+
+    def test_read_result_processing(self, tmp_path):
+        """Test that a log without a result event is still processing"""
+        log = tmp_path / 'task.jsonl'
+        write_events(log, [{'type': 'system'}, {'type': 'assistant'}])
+
+        assert read_result(str(log)) is None
+
+    def test_read_result_completed(self, tmp_path, monkeypatch):
+        """Test that the result event is found by scanning back from the end"""
+        monkeypatch.setattr(task_output, 'TAIL_BLOCK_SIZE', 16)
+        log = tmp_path / 'task.jsonl'
+        write_events(log, [
+            {'type': 'system'},
+            {'type': 'result', 'result': 'Done ' * 20, 'session_id': 'session-1'}
+        ])
+
+        result = read_result(str(log))
+
+        assert result['session_id'] == 'session-1'
+        assert result['result'].startswith('Done')
+
+    def test_append_error_result(self, tmp_path):
+        """Test that a synthetic error result completes the task"""
+        log = tmp_path / 'task.jsonl'
+        log.write_bytes(b"Error: not logged in")
+
+        append_error_result(str(log), 'Agent CLI exited with code 1', 'session-1')
+        result = read_result(str(log))
+
+        assert result['is_error'] is True
+        assert result['session_id'] == 'session-1'
+
+    def test_write_result_file(self, tmp_path, monkeypatch):
+        """Test that the completed response is written once in wire format"""
+        monkeypatch.setattr(config, 'TASK_OUTPUT_DIR', str(tmp_path))
+        monkeypatch.setattr(config, 'TASK_RESULT_DIR', str(tmp_path / 'results'))
+        raw_result = b'{"type": "result", "result": "Done", "session_id": "session-1"}'
+        Path(task_log_path('abc')).write_bytes(b'{"type": "system"}\n' + raw_result + b'\n')
+
+        result_file = write_result_file('abc')
+
+        assert result_file == task_result_path('abc')
+        body = Path(result_file).read_bytes()
+        assert raw_result in body
+        assert json.loads(body) == {'status': 'completed', 'result': json.loads(raw_result)}
+
+    def test_write_result_file_processing(self, tmp_path, monkeypatch):
+        """Test that no response file is written while the task runs"""
+        monkeypatch.setattr(config, 'TASK_OUTPUT_DIR', str(tmp_path))
+        monkeypatch.setattr(config, 'TASK_RESULT_DIR', str(tmp_path / 'results'))
+        write_events(task_log_path('abc'), [{'type': 'system'}])
+
+        assert write_result_file('abc') is None
+        assert not Path(task_result_path('abc')).exists()
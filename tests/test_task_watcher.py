@@ -0,0 +1,174 @@
+import pytest
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add agent-api to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent-api"))
+
+from claude_wrapper import ClaudeWrapper
+from backends import BackendRouter, ClaudeCliBackend
+from budget import UsageStore
+from drain import TaskRegistry
+from notifications import NotificationTargets, NotificationDispatcher
+from task_output import task_log_path, append_event
+from config import config, Config
+
+# main validates credentials and builds its wrapper at import time
+with patch.object(Config, 'AUTH_USERNAME', 'testuser'), patch.object(Config, 'AUTH_PASSWORD', 'testpass'), \
+        patch.object(ClaudeWrapper, '_check_authentication'):
+    import main
+
+
+def fake_cli(tmp_path, name, body):
+    """
+    Executable standing in for an agent CLI
+
+    It records its name in ran.txt, then runs body (Python source) with
+    emit(event) printing one stream-json event.
+    """
+    script = tmp_path / name
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import json, sys, time\n"
+        f"open({str(tmp_path / 'ran.txt')!r}, 'a').write({name!r} + '\\n')\n"
+        "def emit(event):\n"
+        "    print(json.dumps(event), flush=True)\n"
+        f"{body}\n"
+    )
+    script.chmod(0o755)
+    return ClaudeCliBackend(name=name, command=str(script))
+
+
+RESULT = "emit({'type': 'result', 'result': 'Done', 'session_id': 'session-1', 'total_cost_usd': 0.5, 'num_turns': 1})"
+ASSISTANT = "emit({'type': 'assistant', 'message': {'content': 'Editing files'}})"
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    """Run a task through main._launch and main._watch_task against fake CLIs"""
+    monkeypatch.setattr(config, 'TASK_OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'TASK_RESULT_DIR', str(tmp_path / 'results'))
+    monkeypatch.setattr(config, 'TASK_TIMEOUT_SECONDS', 30)
+    monkeypatch.setattr(main.claude_wrapper, 'project_path', str(tmp_path))
+    monkeypatch.setattr(main, 'usage_store', UsageStore(str(tmp_path / 'usage.json')))
+    monkeypatch.setattr(main, 'task_registry', TaskRegistry(str(tmp_path / 'tasks.json')))
+    monkeypatch.setattr(main, 'notification_dispatcher',
+                        NotificationDispatcher(NotificationTargets(str(tmp_path / 'notifications.json'))))
+
+    def run(*backends):
+        monkeypatch.setattr(main, 'backend_router', BackendRouter(list(backends)))
+        task_id = 'abc'
+        process, backend, fallbacks = main._launch(list(backends), 'Hello', None, task_id)
+        main.task_registry.add(task_id, pid=process.pid, backend=backend.name, started=time.time())
+        main._watch_task(process, backend, fallbacks, task_id, 'Hello', 'alice', None)
+
+        ran_file = tmp_path / 'ran.txt'
+        ran = ran_file.read_text().split() if ran_file.exists() else []
+        events = [json.loads(line) for line in Path(task_log_path(task_id)).read_text().splitlines()]
+        return ran, events
+
+    return run
+
+
+class TestWatchTask:
+    """Test fallback and completion of async tasks"""
+
+    def test_success(self, watcher, tmp_path):
+        """Test that a successful run ends the log with its result and books usage"""
+        ran, events = watcher(fake_cli(tmp_path, 'first', f"{ASSISTANT}\n{RESULT}"))
+
+        assert ran == ['first']
+        assert events[-1]['result'] == 'Done'
+        assert main.usage_store.summary('alice')['user']['cost'] == 0.5
+        assert not main.task_registry.owns('abc')
+
+    def test_falls_back_on_failed_exit(self, watcher, tmp_path):
+        """Test that a run failing before any progress is retried on the next backend"""
+        ran, events = watcher(
+            fake_cli(tmp_path, 'first', "sys.exit(1)"),
+            fake_cli(tmp_path, 'second', RESULT)
+        )
+
+        assert ran == ['first', 'second']
+        assert [e.get('subtype') for e in events] == ['backend_error', None]
+        assert events[0]['backend'] == 'first'
+        assert events[-1]['result'] == 'Done'
+
+    def test_falls_back_when_launch_fails(self, watcher, tmp_path):
+        """Test that a backend whose CLI cannot be started is skipped"""
+        missing = ClaudeCliBackend(name='missing', command=str(tmp_path / 'not-installed'))
+
+        ran, events = watcher(missing, fake_cli(tmp_path, 'second', RESULT))
+
+        assert ran == ['second']
+        assert events[0]['subtype'] == 'backend_error'
+        assert events[-1]['result'] == 'Done'
+
+    def test_no_replay_after_progress(self, watcher, tmp_path):
+        """Test that a run failing after an assistant event is not retried"""
+        ran, events = watcher(
+            fake_cli(tmp_path, 'first', f"{ASSISTANT}\nsys.exit(1)"),
+            fake_cli(tmp_path, 'second', RESULT)
+        )
+
+        assert ran == ['first']
+        assert events[-1]['type'] == 'result'
+        assert events[-1]['is_error'] is True
+        assert 'not retried' in events[-1]['result']
+        assert main.usage_store.summary('alice')['user']['cost'] == 0
+
+    def test_timeout_falls_back(self, watcher, tmp_path, monkeypatch):
+        """Test that a run exceeding TASK_TIMEOUT_SECONDS without progress is retried"""
+        monkeypatch.setattr(config, 'TASK_TIMEOUT_SECONDS', 1)
+
+        ran, events = watcher(
+            fake_cli(tmp_path, 'first', "time.sleep(30)"),
+            fake_cli(tmp_path, 'second', RESULT)
+        )
+
+        assert ran == ['first', 'second']
+        assert 'timed out' in events[0]['error']
+        assert events[-1]['result'] == 'Done'
+
+    def test_all_backends_fail(self, watcher, tmp_path):
+        """Test that the log is closed with an error result when no backend succeeds"""
+        ran, events = watcher(
+            fake_cli(tmp_path, 'first', "sys.exit(1)"),
+            fake_cli(tmp_path, 'second', "sys.exit(2)")
+        )
+
+        assert ran == ['first', 'second']
+        assert events[-1]['is_error'] is True
+        assert 'exited with code 2' in events[-1]['result']
+
+
+class TestScanRun:
+    """Test inspection of the latest run in a task log"""
+
+    def test_ignores_events_before_backend_error(self, tmp_path):
+        """Test that progress and results of an earlier failed run do not count"""
+        log = str(tmp_path / 'task.jsonl')
+        backend = ClaudeCliBackend()
+        append_event(log, {'type': 'assistant'})
+        append_event(log, {'type': 'result', 'result': 'stale', 'session_id': 's'})
+        append_event(log, {'type': 'system', 'subtype': 'backend_error', 'backend': 'claude', 'error': 'failed'})
+        append_event(log, {'type': 'system', 'subtype': 'init'})
+
+        assert main._scan_run(log, backend) == (None, False)
+
+    def test_finds_result_before_trailing_events(self, tmp_path):
+        """Test that the result need not be the last line of the run"""
+        log = str(tmp_path / 'task.jsonl')
+        backend = ClaudeCliBackend()
+        append_event(log, {'type': 'assistant'})
+        append_event(log, {'type': 'result', 'result': 'Done', 'session_id': 's'})
+        append_event(log, {'type': 'system', 'subtype': 'shutdown'})
+
+        output, progressed = main._scan_run(log, backend)
+
+        assert output['result'] == 'Done'
+        assert progressed is True